@@ -22,6 +22,7 @@ import posixpath
 import pwd
 import re
 import rpm
+import shlex
 import shutil
 import six
 import sys
@@ -41,7 +42,7 @@ from pyrpkg.errors import HashtypeMixingError, rpkgError, rpkgAuthError, \
 from .gitignore import GitIgnore
 from pyrpkg.lookaside import CGILookasideCache
 from pyrpkg.sources import SourcesFile
-from pyrpkg.utils import cached_property, log_result
+from pyrpkg.utils import cached_property, is_overridden, log_result
 from pyrpkg.pkgrepo import PackageRepo
 
 
@@ -699,6 +700,20 @@ class Commands(object):
                             # int and float this to remove the decimal
                             "--define '%s 1'" % self._disttag]
 
+    @property
+    def rpmdefines_args(self):
+        """rpmdefines split into separate command arguments
+
+        rpmdefines are shell quoted strings, this splits them the same way
+        the shell would, so that rpmbuild can be run without one. They are
+        split again on each use, so that reloaded rpmdefines are followed.
+        """
+
+        args = []
+        for define in self.rpmdefines:
+            args.extend(shlex.split(define))
+        return args
+
     @property
     def spec(self):
         """This property ensures the module attribute"""
@@ -1331,9 +1346,6 @@ class Commands(object):
 
         """
 
-        # Things work better if we're in our module directory
-        oldpath = os.getcwd()
-        os.chdir(self.path)
         # build up the command
         cmd = ['git', 'diff']
         if cached:
@@ -1341,10 +1353,8 @@ class Commands(object):
         if files:
             cmd.extend(files)
 
-        # Run it!
-        self._run_command(cmd)
-        # popd
-        os.chdir(oldpath)
+        # Run it from our module directory, files are relative to it
+        self._run_command(cmd, cwd=self.path)
         return
 
     def get_latest_commit(self, module, branch):
@@ -1451,16 +1461,12 @@ class Commands(object):
                 except ValueError:
                     pass
 
-        # Things work better if we're in our module directory
-        oldpath = os.getcwd()
-        os.chdir(self.path)
-
         # Look through our files and if it isn't in the new files, remove it.
         for file in ourfiles:
             if file not in files:
                 self.log.info("Removing no longer used file: %s", file)
                 self.repo.repo.index.remove([file])
-                os.remove(file)
+                os.remove(os.path.join(self.path, file))
 
         # Extract new files
         cmd = ['rpm2cpio', srpm]
@@ -1469,23 +1475,22 @@ class Commands(object):
         cmd2 = ['cpio', '-iud', '--quiet']
 
         rpmcall = subprocess.Popen(cmd, stdout=subprocess.PIPE)
-        cpiocall = subprocess.Popen(cmd2, stdin=rpmcall.stdout)
+        cpiocall = subprocess.Popen(cmd2, stdin=rpmcall.stdout, cwd=self.path)
         output, err = cpiocall.communicate()
         if output:
             self.log.debug(output)
         if err:
-            os.chdir(oldpath)
             raise rpkgError("Got an error from rpm2cpio: %s" % err)
 
         # And finally add all the files we know about (and our stock files)
         for file in ('.gitignore', 'sources'):
-            if not os.path.exists(file):
+            filepath = os.path.join(self.path, file)
+            if not os.path.exists(filepath):
                 # Create the file
-                open(file, 'w').close()
+                open(filepath, 'w').close()
             files.append(file)
         self.repo.repo.index.add(files)
         # Return to the caller and let them take it from there.
-        os.chdir(oldpath)
         return [os.path.join(self.path, file) for file in uploadfiles]
 
     def list_tag(self, tagname='*'):
@@ -1564,7 +1569,8 @@ class Commands(object):
 
         # See if we are rediffing and handle the old patch file
         if rediff:
-            oldpatch = open(os.path.join(self.path, outfile), 'r').readlines()
+            with open(os.path.join(self.path, outfile), 'r') as f:
+                oldpatch = f.readlines()
             # back up the old file
             self.log.debug('Moving existing patch %s to %s~', outfile, outfile)
             os.rename(os.path.join(self.path, outfile),
@@ -1582,7 +1588,8 @@ class Commands(object):
             output = ''.join(newhead) + output
 
         # Write out the patch
-        open(os.path.join(self.path, outfile), 'w').write(output)
+        with open(os.path.join(self.path, outfile), 'w') as f:
+            f.write(output)
 
         # Add it to the index
         # Again this returns a blank line we want to keep quiet
@@ -1665,7 +1672,33 @@ class Commands(object):
                 # expand lookaside cache urls - make it optional.
                 args['branch'] = self.repo.branch_merge
 
-        for entry in sourcesf.entries:
+        def is_downloaded(entry):
+            outfile = os.path.join(outdir, entry.file)
+            return os.path.exists(outfile) and self.lookasidecache.file_is_valid(
+                outfile, entry.hash, hashtype=entry.hashtype)
+
+        # Verify the files which are already there in parallel, hashing
+        # releases the GIL. Downloads are kept serial as each one prints its
+        # own progress bar.
+        entries = sourcesf.entries
+        checked = len(entries) > 1
+        if checked:
+            pool = ThreadPool(min(len(entries), 8))
+            try:
+                downloaded = pool.map(is_downloaded, entries)
+            finally:
+                pool.close()
+                pool.join()
+            entries = [entry for entry, skip in zip(entries, downloaded)
+                       if not skip]
+
+        # Lookaside caches overriding download() may not accept check_local,
+        # or would take it for one of the arguments of the download URL.
+        if checked and not is_overridden(self.lookasidecache, CGILookasideCache,
+                                         'download'):
+            args['check_local'] = False
+
+        for entry in entries:
             outfile = os.path.join(outdir, entry.file)
             self.lookasidecache.download(
                 self.ns_module_name if self.lookaside_namespaced else self.module_name,
@@ -2179,7 +2212,8 @@ class Commands(object):
 
         config_file = os.path.join(config_dir, '%s.cfg' % root)
         try:
-            open(config_file, 'wb').write(config_content)
+            with open(config_file, 'wb') as f:
+                f.write(config_content)
         except IOError as error:
             self._cleanup_tmp_dir(my_config_dir)
             raise rpkgError('Could not write config file: %s' % error)
@@ -2254,7 +2288,9 @@ class Commands(object):
         sourcesf = SourcesFile(self.sources_filename, self.source_entry_type,
                                replace=replace)
         gitignore = GitIgnore(os.path.join(self.path, '.gitignore'))
+        module_name = self.ns_module_name if self.lookaside_namespaced else self.module_name
 
+        to_upload = []
         for f in files:
             # TODO: Skip empty file needed?
             file_hash = self.lookasidecache.hash_file(f)
@@ -2278,9 +2314,25 @@ class Commands(object):
                 raise rpkgError(msg)
 
             gitignore.add('/%s' % file_basename)
-            self.lookasidecache.upload(
-                self.ns_module_name if self.lookaside_namespaced else self.module_name,
-                f, file_hash)
+            to_upload.append((f, file_basename, file_hash))
+
+        if is_overridden(self.lookasidecache, CGILookasideCache, 'upload'):
+            # Lookaside caches overriding upload() may not accept
+            # check_remote, let them check each file themselves.
+            for f, file_basename, file_hash in to_upload:
+                self.lookasidecache.upload(module_name, f, file_hash)
+        else:
+            # Ask the lookaside cache about all the files at once rather than
+            # once per file, then only upload the ones it does not have yet.
+            uploaded = self.lookasidecache.remote_files_exist(
+                module_name,
+                [(file_basename, file_hash) for f, file_basename, file_hash in to_upload])
+            for f, file_basename, file_hash in to_upload:
+                if (file_basename, file_hash) in uploaded:
+                    self.log.info("File already uploaded: %s", f)
+                    continue
+                self.lookasidecache.upload(module_name, f, file_hash,
+                                           check_remote=False)
 
         sourcesf.write()
         gitignore.write()
@@ -2298,17 +2350,17 @@ class Commands(object):
 
         # setup the rpm command
         cmd = ['rpmbuild']
-        cmd.extend(self.rpmdefines)
+        cmd.extend(self.rpmdefines_args)
         if builddir:
             # Tack on a new builddir to the end of the defines
-            cmd.append("--define '_builddir %s'" % os.path.abspath(builddir))
+            cmd.extend(['--define', '_builddir %s' % os.path.abspath(builddir)])
         if arch:
             cmd.extend(['--target', arch])
         if self.quiet:
             cmd.append('--quiet')
         cmd.extend(['--nodeps', '-bp', os.path.join(self.path, self.spec)])
         # Run the command
-        self._run_command(cmd, shell=True)
+        self._run_command(cmd)
 
     def srpm(self, hashtype=None):
         """Create an srpm using hashtype from content in the module
@@ -2325,7 +2377,7 @@ class Commands(object):
             self.log.debug('Srpm found, rewriting it.')
 
         cmd = ['rpmbuild']
-        cmd.extend(self.rpmdefines)
+        cmd.extend(self.rpmdefines_args)
         if self.quiet:
             cmd.append('--quiet')
         # Figure out which hashtype to use, if not provided one
@@ -2334,12 +2386,10 @@ class Commands(object):
             hashtype = self._guess_hashtype()
         # This may need to get updated if we ever change our checksum default
         if not hashtype == 'sha256':
-            cmd.extend(["--define '_source_filedigest_algorithm %s'"
-                        % hashtype,
-                        "--define '_binary_filedigest_algorithm %s'"
-                        % hashtype])
+            cmd.extend(['--define', '_source_filedigest_algorithm %s' % hashtype,
+                        '--define', '_binary_filedigest_algorithm %s' % hashtype])
         cmd.extend(['--nodeps', '-bs', os.path.join(self.path, self.spec)])
-        self._run_command(cmd, shell=True)
+        self._run_command(cmd)
 
     def unused_patches(self):
         """Discover patches checked into source control that are not used
@@ -2368,12 +2418,13 @@ class Commands(object):
         # Replace %{version} with the package version
         spec = spec.replace("%{version}", self.ver)
 
-        # Get a list of files tracked in source control
-        files = self.repo.git.ls_files('--exclude-standard').split()
-        for file in files:
-            # throw out non patches
-            if not file.endswith(('.patch', '.diff')):
-                continue
+        # Get a list of patches tracked in source control. Read them from the
+        # index directly rather than running git ls-files. Entries are keyed by
+        # (path, stage), so a conflicted path may be listed more than once.
+        patches = sorted(set(
+            path for path, stage in self.repo.index.entries
+            if path.endswith(('.patch', '.diff'))))
+        for file in patches:
             if file not in spec:
                 unused.append(file)
         return unused
@@ -2402,15 +2453,15 @@ class Commands(object):
 
         # setup the rpm command
         cmd = ['rpmbuild']
-        cmd.extend(self.rpmdefines)
+        cmd.extend(self.rpmdefines_args)
         if builddir:
             # Tack on a new builddir to the end of the defines
-            cmd.append("--define '_builddir %s'" % os.path.abspath(builddir))
+            cmd.extend(['--define', '_builddir %s' % os.path.abspath(builddir)])
         if self.quiet:
             cmd.append('--quiet')
         cmd.extend(['-bl', os.path.join(self.path, self.spec)])
         # Run the command
-        self._run_command(cmd, shell=True)
+        self._run_command(cmd)
 
     def container_build_koji(self, target_override=False, opts={},
                              kojiconfig=None, kojiprofile=None,
@@ -2936,7 +2987,8 @@ class Commands(object):
 
     def module_watch_build(self, api_url, build_id):
         """
-        Watches the MBS build in a loop that updates every 15 seconds.
+        Watches the MBS build in a loop that updates every 15 seconds. While
+        no component changes its state, the interval doubles up to 1 minute.
         The loop ends when the build state is 'failed', 'done', or 'ready'.
         :param api_url: a string of the URL of the MBS API
         :param build_id: an integer of the module build to watch.
@@ -2945,15 +2997,25 @@ class Commands(object):
         # Load the Koji session anonymously so we get access to the Koji web
         # URL
         self.load_kojisession(anon=True)
+        state_names = self.module_get_koji_state_dict()
         done = False
+        interval = 15
+        last_states = None
         while not done:
-            state_names = self.module_get_koji_state_dict()
             build = self.module_get_build(api_url, build_id)
             tasks = {}
             if 'rpms' in build['tasks']:
                 tasks = build['tasks']['rpms']
 
-            states = list(set([task['state'] for task in tasks.values()]))
+            task_states = dict(
+                (name, task['state']) for name, task in tasks.items())
+            if (build['state_name'], task_states) == last_states:
+                interval = min(interval * 2, 60)
+            else:
+                interval = 15
+            last_states = (build['state_name'], task_states)
+
+            states = list(set(task_states.values()))
             inverted = {}
             for name, task in tasks.items():
                 state = task['state']
@@ -3006,4 +3068,4 @@ class Commands(object):
                 template += ' (koji tag: "{koji_tag}")'
             print(template.format(**build))
             if not done:
-                time.sleep(15)
+                time.sleep(interval)
@@ -14,15 +14,13 @@
 
 from __future__ import print_function
 import argparse
+import importlib
 import logging
 import os
 import pwd
-import random
-import string
+import shlex
 import sys
-import time
 
-import koji_cli.lib
 import pyrpkg.utils as utils
 import six
 
@@ -37,6 +35,28 @@ def warning_deprecated_dist(value):
     return value
 
 
+# Description of the chain-build command, formatted with the client name by
+# register_chainbuild().
+_CHAINBUILD_DESCRIPTION = """
+Build current package in order with other packages.
+
+example: %(name)s chain-build libwidget libgizmo
+
+The current package is added to the end of the CHAIN list.
+Colons (:) can be used in the CHAIN parameter to define groups of
+packages.  Packages in any single group will be built in parallel
+and all packages in a group must build successfully and populate
+the repository before the next group will begin building.
+
+For example:
+
+%(name)s chain-build libwidget libaselib : libgizmo :
+
+will cause libwidget and libaselib to be built in parallel, followed
+by libgizmo and then the current directory package. If no groups are
+defined, packages will be built sequentially."""
+
+
 class cliClient(object):
     """This is a client class for rpkg clients."""
 
@@ -53,6 +73,7 @@ class cliClient(object):
         # Property holders, set to none
         self._cmd = None
         self._module = None
+        self._config_items = None
         # Setup the base argparser
         self.setup_argparser()
         # Add a subparser
@@ -95,6 +116,17 @@ class cliClient(object):
             self.load_cmd()
         return(self._cmd)
 
+    @property
+    def config_items(self):
+        """Raw items of the config section of this client
+
+        The section is read only once, later lookups use this dict.
+        """
+
+        if self._config_items is None:
+            self._config_items = dict(self.config.items(self.name, raw=True))
+        return self._config_items
+
     def _get_bool_opt(self, opt, default=False):
         try:
             return self.config.getboolean(self.name, opt)
@@ -106,13 +138,13 @@ class cliClient(object):
     def load_cmd(self):
         """This sets up the cmd object"""
 
+        args = self.args
+
         # Set target if we got it as an option
-        target = None
-        if hasattr(self.args, 'target') and self.args.target:
-            target = self.args.target
+        target = getattr(args, 'target', None) or None
 
         # load items from the config file
-        items = dict(self.config.items(self.name, raw=True))
+        items = self.config_items
 
         dg_namespaced = self._get_bool_opt('distgit_namespaced')
         la_namespaced = self._get_bool_opt('lookaside_namespaced')
@@ -124,7 +156,7 @@ class cliClient(object):
 
         kojiconfig = None
 
-        if self.config.has_option(self.name, 'kojiconfig'):
+        if 'kojiconfig' in items:
             kojiconfig = self.config.get(self.name, 'kojiconfig')
             koji_config_type = 'config'
             self.log.warning(
@@ -133,7 +165,7 @@ class cliClient(object):
 
         # kojiprofile has higher priority to be used if both kojiconfig and
         # kojiprofile exist at same time.
-        if self.config.has_option(self.name, 'kojiprofile'):
+        if 'kojiprofile' in items:
             kojiconfig = self.config.get(self.name, 'kojiprofile')
             koji_config_type = 'profile'
 
@@ -142,7 +174,7 @@ class cliClient(object):
                             'session. One of them must be specified.')
 
         # Create the cmd object
-        self._cmd = self.site.Commands(self.args.path,
+        self._cmd = self.site.Commands(args.path,
                                        items['lookaside'],
                                        items['lookasidehash'],
                                        items['lookaside_cgi'],
@@ -152,28 +184,28 @@ class cliClient(object):
                                        kojiconfig,
                                        items['build_client'],
                                        koji_config_type=koji_config_type,
-                                       user=self.args.user,
-                                       dist=self.args.dist or self.args.release,
+                                       user=args.user,
+                                       dist=args.dist or args.release,
                                        target=target,
-                                       quiet=self.args.q,
+                                       quiet=args.q,
                                        distgit_namespaced=dg_namespaced,
                                        realms=realms,
                                        lookaside_namespaced=la_namespaced
                                        )
 
-        if self.args.module_name:
+        if args.module_name:
             # Module name was specified via argument
-            if '/' not in self.args.module_name:
-                self._cmd.module_name = self.args.module_name
+            if '/' not in args.module_name:
+                self._cmd.module_name = args.module_name
                 if dg_namespaced:
                     # No slash, assume rpms namespace
                     self._cmd.ns = 'rpms'
             else:
-                self._cmd.ns, self._cmd.module_name = self.args.module_name.rsplit('/', 1)
-        self._cmd.password = self.args.password
-        self._cmd.runas = self.args.runas
-        self._cmd.debug = self.args.debug
-        self._cmd.verbose = self.args.v
+                self._cmd.ns, self._cmd.module_name = args.module_name.rsplit('/', 1)
+        self._cmd.password = args.password
+        self._cmd.runas = args.runas
+        self._cmd.debug = args.debug
+        self._cmd.verbose = args.v
         self._cmd.clone_config = items.get('clone_config')
         self._cmd.lookaside_request_params = items.get('lookaside_request_params')
 
@@ -193,8 +225,7 @@ class cliClient(object):
             self.site = pyrpkg
         else:
             try:
-                __import__(site)
-                self.site = sys.modules[site]
+                self.site = importlib.import_module(site)
             except ImportError:
                 raise Exception('Unknown site %s' % site)
 
@@ -321,16 +352,29 @@ class cliClient(object):
         help_parser.set_defaults(command=self.parser.print_help)
 
     # Setup a couple common parsers to save code duplication
+    @utils.cached_property
+    def md5_parser_common(self):
+        """A common parser for commands accepting --md5
+
+        It is created on first use, by whichever command registers first.
+        """
+
+        parser = argparse.ArgumentParser('md5_common', add_help=False)
+        # Allow the user to just pass "--md5" which will set md5 as the
+        # hash, otherwise use the default of sha256
+        parser.add_argument(
+            '--md5', action='store_const', const='md5', default=None,
+            dest='hash', help='Use md5 checksums (for older rpm hosts)')
+        return parser
+
     def register_build_common(self):
         """Create a common build parser to use in other commands"""
 
         self.build_parser_common = argparse.ArgumentParser(
-            'build_common', add_help=False)
+            'build_common', add_help=False,
+            parents=[self.md5_parser_common])
         self.build_parser_common.add_argument(
             '--arches', nargs='*', help='Build for specific arches')
-        self.build_parser_common.add_argument(
-            '--md5', action='store_const', const='md5', default=None,
-            dest='hash', help='Use md5 checksums (for older rpm hosts)')
         self.build_parser_common.add_argument(
             '--nowait', action='store_true', default=False,
             help="Don't wait on build")
@@ -385,24 +429,7 @@ class cliClient(object):
             'chain-build', parents=[self.build_parser_common],
             help='Build current package in order with other packages',
             formatter_class=argparse.RawDescriptionHelpFormatter,
-            description="""
-Build current package in order with other packages.
-
-example: %(name)s chain-build libwidget libgizmo
-
-The current package is added to the end of the CHAIN list.
-Colons (:) can be used in the CHAIN parameter to define groups of
-packages.  Packages in any single group will be built in parallel
-and all packages in a group must build successfully and populate
-the repository before the next group will begin building.
-
-For example:
-
-%(name)s chain-build libwidget libaselib : libgizmo :
-
-will cause libwidget and libaselib to be built in parallel, followed
-by libgizmo and then the current directory package. If no groups are
-defined, packages will be built sequentially.""" % {'name': self.name})
+            description=_CHAINBUILD_DESCRIPTION % {'name': self.name})
         chainbuild_parser.add_argument(
             'package', nargs='+',
             help='List the packages and order you want to build in')
@@ -437,86 +464,92 @@ defined, packages will be built sequentially.""" % {'name': self.name})
     def register_clone(self):
         """Register the clone target and co alias"""
 
-        clone_parser = self.subparsers.add_parser(
-            'clone', help='Clone and checkout a module',
-            description='This command will clone the named module from the '
-                        'configured repository base URL. By default it will '
-                        'also checkout the master branch for your working '
-                        'copy.')
+        # Arguments shared by clone and its co alias. Being a parent parser
+        # without -h, both can use it with no conflict to resolve.
+        clone_args = argparse.ArgumentParser('clone_args', add_help=False)
         # Allow an old style clone with subdirs for branches
-        clone_parser.add_argument(
+        clone_args.add_argument(
             '--branches', '-B', action='store_true',
             help='Do an old style checkout with subdirs for branches')
         # provide a convenient way to get to a specific branch
-        clone_parser.add_argument(
+        clone_args.add_argument(
             '--branch', '-b', help='Check out a specific branch')
         # allow to clone without needing a account on the scm server
-        clone_parser.add_argument(
+        clone_args.add_argument(
             '--anonymous', '-a', action='store_true',
             help='Check out a module anonymously')
         # store the module to be cloned
-        clone_parser.add_argument(
+        clone_args.add_argument(
             'module', nargs=1, help='Name of the module to clone')
         # Eventually specify where to clone the module
-        clone_parser.add_argument(
+        clone_args.add_argument(
             "clone_target", default=None, nargs="?",
             help='Directory in which to clone the module')
+
+        clone_parser = self.subparsers.add_parser(
+            'clone', parents=[clone_args],
+            help='Clone and checkout a module',
+            description='This command will clone the named module from the '
+                        'configured repository base URL. By default it will '
+                        'also checkout the master branch for your working '
+                        'copy.')
         clone_parser.set_defaults(command=self.clone)
 
         # Add an alias for historical reasons
         co_parser = self.subparsers.add_parser(
-            'co', parents=[clone_parser], conflict_handler='resolve',
-            help='Alias for clone')
+            'co', parents=[clone_args], help='Alias for clone')
         co_parser.set_defaults(command=self.clone)
 
     def register_commit(self):
         """Register the commit target and ci alias"""
 
-        commit_parser = self.subparsers.add_parser(
-            'commit', help='Commit changes',
-            description='This invokes a git commit. All tracked files with '
-                        'changes will be committed unless a specific file '
-                        'list is provided. $EDITOR will be used to generate a'
-                        ' changelog message unless one is given to the '
-                        'command. A push can be done at the same time.')
-        commit_parser.add_argument(
+        # Arguments shared by commit and its ci alias
+        commit_args = argparse.ArgumentParser('commit_args', add_help=False)
+        commit_args.add_argument(
             '-m', '--message', default=None,
             help='Use the given <msg> as the commit message summary')
-        commit_parser.add_argument(
+        commit_args.add_argument(
             '--with-changelog',
             action='store_true',
             default=None,
             help='Get the last changelog from SPEC as commit message content. '
                  'This option must be used with -m together.')
-        commit_parser.add_argument(
+        commit_args.add_argument(
             '-c', '--clog', default=False, action='store_true',
             help='Generate the commit message from the Changelog section')
-        commit_parser.add_argument(
+        commit_args.add_argument(
             '--raw', action='store_true', default=False,
             help='Make the clog raw')
-        commit_parser.add_argument(
+        commit_args.add_argument(
             '-t', '--tag', default=False, action='store_true',
             help='Create a tag for this commit')
-        commit_parser.add_argument(
+        commit_args.add_argument(
             '-F', '--file', default=None,
             help='Take the commit message from the given file')
         # allow one to commit /and/ push at the same time.
-        commit_parser.add_argument(
+        commit_args.add_argument(
             '-p', '--push', default=False, action='store_true',
             help='Commit and push as one action')
         # Allow a list of files to be committed instead of everything
-        commit_parser.add_argument(
+        commit_args.add_argument(
             'files', nargs='*', default=[],
             help='Optional list of specific files to commit')
-        commit_parser.add_argument(
+        commit_args.add_argument(
             '-s', '--signoff', default=False, action='store_true',
             help='Include a signed-off-by')
+
+        commit_parser = self.subparsers.add_parser(
+            'commit', parents=[commit_args], help='Commit changes',
+            description='This invokes a git commit. All tracked files with '
+                        'changes will be committed unless a specific file '
+                        'list is provided. $EDITOR will be used to generate a'
+                        ' changelog message unless one is given to the '
+                        'command. A push can be done at the same time.')
         commit_parser.set_defaults(command=self.commit)
 
         # Add a ci alias
         ci_parser = self.subparsers.add_parser(
-            'ci', parents=[commit_parser], conflict_handler='resolve',
-            help='Alias for commit')
+            'ci', parents=[commit_args], help='Alias for commit')
         ci_parser.set_defaults(command=self.commit)
 
     def register_compile(self):
@@ -639,16 +672,11 @@ defined, packages will be built sequentially.""" % {'name': self.name})
         """Register the local target"""
 
         local_parser = self.subparsers.add_parser(
-            'local', parents=[self.rpm_parser_common],
+            'local', parents=[self.rpm_parser_common, self.md5_parser_common],
             help='Local test rpmbuild binary',
             description='Locally test run of rpmbuild producing binary RPMs. '
                         'The rpmbuild output will be logged into a file named'
                         ' .build-%{version}-%{release}.log')
-        # Allow the user to just pass "--md5" which will set md5 as the
-        # hash, otherwise use the default of sha256
-        local_parser.add_argument(
-            '--md5', action='store_const', const='md5', default=None,
-            dest='hash', help='Use md5 checksums (for older rpm hosts)')
         local_parser.set_defaults(command=self.local)
 
     def register_new(self):
@@ -666,6 +694,7 @@ defined, packages will be built sequentially.""" % {'name': self.name})
 
         mockbuild_parser = self.subparsers.add_parser(
             'mockbuild', help='Local test build using mock',
+            parents=[self.md5_parser_common],
             description='This will use the mock utility to build the package '
                         'for the distribution detected from branch '
                         'information. This can be overridden using the global'
@@ -678,11 +707,6 @@ defined, packages will be built sequentially.""" % {'name': self.name})
         mockbuild_parser.add_argument(
             '--root', '--mock-config', metavar='CONFIG',
             dest='root', help='Override mock configuration (like mock -r)')
-        # Allow the user to just pass "--md5" which will set md5 as the
-        # hash, otherwise use the default of sha256
-        mockbuild_parser.add_argument(
-            '--md5', action='store_const', const='md5', default=None,
-            dest='hash', help='Use md5 checksums (for older rpm hosts)')
         mockbuild_parser.add_argument(
             '--no-clean', '-n', help='Do not clean chroot before building '
             'package', action='store_true')
@@ -897,11 +921,8 @@ defined, packages will be built sequentially.""" % {'name': self.name})
 
         srpm_parser = self.subparsers.add_parser(
             'srpm', help='Create a source rpm',
+            parents=[self.md5_parser_common],
             description='Create a source rpm')
-        # optionally define old style hashsums
-        srpm_parser.add_argument(
-            '--md5', action='store_const', const='md5', default=None,
-            dest='hash', help='Use md5 checksums (for older rpm hosts)')
         srpm_parser.set_defaults(command=self.srpm)
 
     def register_copr_build(self):
@@ -1094,21 +1115,23 @@ see API KEY section of copr-cli(1) man page.
         self.parser.print_help()
 
     def build(self, sets=None):
+        # Only builds need these, do not import them for every command
+        import koji_cli.lib
+        import random
+        import string
+        import time
+
         # We may have gotten arches by way of scratch build, so handle them
-        arches = None
-        if hasattr(self.args, 'arches'):
-            arches = self.args.arches
+        arches = getattr(self.args, 'arches', None)
         # Place holder for if we build with an uploaded srpm or not
         url = None
         # See if this is a chain or not
-        chain = None
-        if hasattr(self.args, 'chain'):
-            chain = self.args.chain
+        chain = getattr(self.args, 'chain', None)
         # Need to do something with BUILD_FLAGS or KOJI_FLAGS here for compat
         if self.args.target:
             self.cmd._target = self.args.target
         # handle uploading the srpm if we got one
-        if hasattr(self.args, 'srpm') and self.args.srpm:
+        if getattr(self.args, 'srpm', None):
             # See if we need to generate the srpm first
             if self.args.srpm == 'CONSTRUCT':
                 self.log.debug('Generating an srpm')
@@ -1131,9 +1154,7 @@ see API KEY section of copr-cli(1) man page.
             url = '%s/%s' % (uniquepath, os.path.basename(self.args.srpm))
         # nvr_check option isn't set by all commands which calls this
         # function so handle it as an optional argument
-        nvr_check = True
-        if hasattr(self.args, 'nvr_check'):
-            nvr_check = self.args.nvr_check
+        nvr_check = getattr(self.args, 'nvr_check', True)
         task_id = self.cmd.build(self.args.skip_tag, self.args.scratch,
                                  self.args.background, url, chain, arches,
                                  sets, nvr_check)
@@ -1159,6 +1180,12 @@ see API KEY section of copr-cli(1) man page.
         sets = False
         urls = []
         build_set = []
+        # If there are no ':' in the chain list, treat each object as an
+        # individual chain
+        grouped = ':' in self.args.package
+        # A component may appear more than once in the chain, only ask for
+        # its latest commit once.
+        component_urls = {}
         self.log.debug('Processing chain %s', ' '.join(self.args.package))
         for component in self.args.package:
             if component == ':':
@@ -1169,15 +1196,17 @@ see API KEY section of copr-cli(1) man page.
                 build_set = []
                 sets = True
             else:
-                # Figure out the scm url to build from package name
-                hash = self.cmd.get_latest_commit(component, self.cmd.repo.branch_merge)
-                # Passing given package name to module_name parameter directly without
-                # guessing namespace as no way to guess that. rpms/ will be
-                # added by default if namespace is not given.
-                url = self.cmd.construct_build_url(component, hash)
-                # If there are no ':' in the chain list, treat each object as
-                # an individual chain
-                if ':' in self.args.package:
+                url = component_urls.get(component)
+                if url is None:
+                    # Figure out the scm url to build from package name
+                    hash = self.cmd.get_latest_commit(component,
+                                                      self.cmd.repo.branch_merge)
+                    # Passing given package name to module_name parameter directly
+                    # without guessing namespace as no way to guess that. rpms/
+                    # will be added by default if namespace is not given.
+                    url = self.cmd.construct_build_url(component, hash)
+                    component_urls[component] = url
+                if grouped:
                     build_set.append(url)
                 else:
                     urls.append([url])
@@ -1285,6 +1314,8 @@ see API KEY section of copr-cli(1) man page.
         self.container_build()
 
     def container_build(self):
+        import koji_cli.lib
+
         target_override = False
         # Override the target if we were supplied one
         if self.args.target:
@@ -1411,11 +1442,7 @@ see API KEY section of copr-cli(1) man page.
                 mockargs.extend(['--without', arg])
 
         # Pick up any mockargs from the env
-        try:
-            mockargs += os.environ['MOCKARGS'].split()
-        except KeyError:
-            # there were no args
-            pass
+        mockargs += shlex.split(os.environ.get('MOCKARGS', ''))
         try:
             self.cmd.mockbuild(mockargs, self.args.root,
                                hashtype=self.args.hash)
@@ -1612,10 +1639,13 @@ see API KEY section of copr-cli(1) man page.
 
     def new_sources(self):
         # Check to see if the files passed exist
-        for file in self.args.files:
-            if not os.path.isfile(file):
-                raise Exception('Path does not exist or is '
-                                'not a file: %s' % file)
+        missing = [f for f in self.args.files if not os.path.isfile(f)]
+        if len(missing) == 1:
+            raise Exception('Path does not exist or is '
+                            'not a file: %s' % missing[0])
+        if missing:
+            raise Exception('Paths do not exist or are '
+                            'not files: %s' % ', '.join(missing))
         self.cmd.upload(self.args.files, replace=self.args.replace)
         self.log.info("Source upload succeeded. Don't forget to commit the "
                       "sources file")
@@ -1669,10 +1699,9 @@ see API KEY section of copr-cli(1) man page.
             (locals, remotes) = self.cmd.repo.list_branches()
             # This is some ugly stuff here, but trying to emulate
             # the way git branch looks
-            locals = ['  %s  ' % branch for branch in locals]
             local_branch = self.cmd.repo.active_branch.name
-            locals[locals.index('  %s  ' %
-                                local_branch)] = '* %s' % local_branch
+            locals = ['* %s' % branch if branch == local_branch
+                      else '  %s  ' % branch for branch in locals]
             print('Locals:\n%s\nRemotes:\n  %s' %
                   ('\n'.join(locals), '\n  '.join(remotes)))
 
@@ -1695,7 +1724,11 @@ see API KEY section of copr-cli(1) man page.
 
     def unused_patches(self):
         unused = self.cmd.unused_patches()
-        print('\n'.join(unused))
+        if not unused:
+            # An empty line, as when the list was printed joined
+            print()
+        for patch in unused:
+            print(patch)
 
     def verify_files(self):
         self.cmd.verify_files(builddir=self.args.builddir)
@@ -12,6 +12,7 @@
 
 import fnmatch
 import os
+import re
 
 
 class GitIgnore(object):
@@ -35,6 +36,15 @@ class GitIgnore(object):
                 for line in f:
                     self.__lines.append(self.__ensure_newline(line))
 
+        # The normalized lines sorted for matching new lines against them: a
+        # set of the lines without wildcards, suffixes of the plain "*.ext"
+        # lines, and the other lines, compiled in one regex. Built lazily on
+        # the first match, then kept up to date by add(), see __compile.
+        self.__literals = None
+        self.__suffixes = None
+        self.__patterns = None
+        self.__regex = None
+
         # Set to True if we end up making any modifications, used to
         # prevent unnecessary writes.
         self.modified = False
@@ -54,12 +64,51 @@ class GitIgnore(object):
 
         line = self.__ensure_newline(line)
         self.__lines.append(line)
+        # match() compiled the existing lines already, only the new one needs
+        # to be added to them.
+        if self.__index(line):
+            self.__compile_regex()
         self.modified = True
 
+    def __index(self, line):
+        """Sort a line into the structures used for matching
+
+        Returns:
+            True if the line is a pattern and the regex needs rebuilding.
+        """
+        entry = line.lstrip('/').rstrip('\n')
+        if not any(c in entry for c in '*?['):
+            self.__literals.add(entry)
+        elif entry.startswith('*.') and not any(c in entry[1:] for c in '*?['):
+            self.__suffixes += (entry[1:],)
+        else:
+            self.__patterns.append(entry)
+            return True
+        return False
+
+    def __compile_regex(self):
+        self.__regex = None
+        if self.__patterns:
+            self.__regex = re.compile('|'.join(
+                '(?:%s)' % fnmatch.translate(p) for p in self.__patterns))
+
+    def __compile(self):
+        self.__literals = set()
+        self.__suffixes = ()
+        self.__patterns = []
+
+        for line in self.__lines:
+            self.__index(line)
+
+        self.__compile_regex()
+
     def match(self, line):
         """Check whether the line matches an existing one
 
-        This uses fnmatch to match against wildcards.
+        This uses fnmatch to match against wildcards. Lines without wildcards
+        are looked up in a set, lines like "*.ext" are matched as plain
+        suffixes, all other lines are translated into a single regex so a line
+        is matched in one pass.
 
         Args:
             line (str): The new line to match against existing ones.
@@ -67,14 +116,14 @@ class GitIgnore(object):
         Returns:
             True if the new line matches, False otherwise.
         """
-        line = line.lstrip('/').rstrip('\n')
+        if self.__literals is None:
+            self.__compile()
 
-        for entry in self.__lines:
-            entry = entry.lstrip('/').rstrip('\n')
-            if fnmatch.fnmatch(line, entry):
-                return True
+        line = line.lstrip('/').rstrip('\n')
+        if line in self.__literals or line.endswith(self.__suffixes):
+            return True
 
-        return False
+        return self.__regex is not None and self.__regex.match(line) is not None
 
     def write(self):
         """Write the file to the disk
@@ -84,7 +133,6 @@ class GitIgnore(object):
         """
         if self.modified:
             with open(self.path, 'w') as f:
-                for line in self.__lines:
-                    f.write(line)
+                f.write(''.join(self.__lines))
 
             self.modified = False
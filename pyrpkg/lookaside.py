@@ -14,9 +14,11 @@ way it is done by Fedora, RHEL, and other distributions maintainers.
 """
 
 
+import errno
 import hashlib
 import io
 import logging
+import mmap
 import os
 import sys
 
@@ -24,6 +26,7 @@ import pycurl
 import six
 
 from .errors import DownloadError, InvalidHashType, UploadError
+from .utils import is_overridden
 from six.moves import http_client
 
 
@@ -56,6 +59,36 @@ class CGILookasideCache(object):
 
         self.download_path = '%(name)s/%(filename)s/%(hash)s/%(filename)s'
 
+        self._curl = None
+        self._progress_line = None
+
+    def get_curl(self):
+        """Get a curl handle to send a request with
+
+        The handle is shared by all the requests made through this object, so
+        that libcurl can reuse its connections to the lookaside cache instead
+        of connecting and negotiating TLS for every file. Its options are
+        reset to their defaults each time.
+
+        Returns:
+            A pycurl.Curl object.
+        """
+        if self._curl is None:
+            self._curl = pycurl.Curl()
+        else:
+            self._curl.reset()
+        return self._curl
+
+    def close(self):
+        """Close the curl handle shared by the requests, if any
+
+        The object can still be used afterwards, a new handle is then created
+        for the next request.
+        """
+        if self._curl is not None:
+            self._curl.close()
+            self._curl = None
+
     def print_progress(self, to_download, downloaded, to_upload, uploaded):
         if not sys.stdout.isatty():
             # Don't print progress if not outputting into TTY. The progress
@@ -76,6 +109,10 @@ class CGILookasideCache(object):
         done = int(done * 1000) / 10.0
 
         p = "\r%s%s %s%%" % ("#" * done_chars, " " * remain_chars, done)
+        # libcurl calls this very often, only redraw when the bar changes.
+        if p == self._progress_line:
+            return
+        self._progress_line = p
         sys.stdout.write(p)
         sys.stdout.flush()
 
@@ -100,12 +137,23 @@ class CGILookasideCache(object):
             raise InvalidHashType(hashtype)
 
         with open(filename, 'rb') as f:
-            chunk = f.read(8192)
-
-            while chunk:
-                sum.update(chunk)
+            # Map the whole file so it is hashed in a single call. Empty files
+            # cannot be mapped, and some files (e.g on special filesystems)
+            # cannot be mapped either, so read those in chunks.
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (EnvironmentError, ValueError):
                 chunk = f.read(8192)
 
+                while chunk:
+                    sum.update(chunk)
+                    chunk = f.read(8192)
+            else:
+                try:
+                    sum.update(mapped)
+                finally:
+                    mapped.close()
+
         return sum.hexdigest()
 
     def file_is_valid(self, filename, hash, hashtype=None):
@@ -132,7 +180,8 @@ class CGILookasideCache(object):
         message = messages.get(http_status, default)
         raise UploadError(message, http_status=http_status)
 
-    def download(self, name, filename, hash, outfile, hashtype=None, **kwargs):
+    def download(self, name, filename, hash, outfile, hashtype=None,
+                 check_local=True, **kwargs):
         """Download a source file
 
         Args:
@@ -144,15 +193,25 @@ class CGILookasideCache(object):
             outfile (str): The full path where to save the downloaded file.
             hashtype (str, optional): The hash algorithm. (e.g 'md5')
                 This defaults to the hashtype passed to the constructor.
+            check_local (bool, optional): Whether to check first if outfile
+                is already there and valid. Callers which already know it is
+                not can pass False to avoid hashing it again. It defaults to
+                True. Commands.sources only passes it when download is not
+                overridden, so subclasses keeping the former signature still
+                work.
             **kwargs: Additional keyword arguments. They will be used when
                 constructing the full URL to the file to download.
         """
         if hashtype is None:
             hashtype = self.hashtype
 
-        if os.path.exists(outfile):
-            if self.file_is_valid(outfile, hash, hashtype=hashtype):
-                return
+        if check_local:
+            try:
+                if self.file_is_valid(outfile, hash, hashtype=hashtype):
+                    return
+            except EnvironmentError as e:
+                if e.errno != errno.ENOENT:
+                    raise
 
         self.log.info("Downloading %s", filename)
         urled_file = filename.replace(' ', '%20')
@@ -167,13 +226,17 @@ class CGILookasideCache(object):
         self.log.debug("Full url: %s", url)
 
         with open(outfile, 'wb') as f:
-            c = pycurl.Curl()
+            c = self.get_curl()
             c.setopt(pycurl.URL, url)
             c.setopt(pycurl.HTTPHEADER, ['Pragma:'])
             c.setopt(pycurl.NOPROGRESS, False)
             c.setopt(pycurl.PROGRESSFUNCTION, self.print_progress)
+            self._progress_line = None
             c.setopt(pycurl.OPT_FILETIME, True)
             c.setopt(pycurl.WRITEDATA, f)
+            # Receive up to 1 MiB per call to write() rather than 16 KiB.
+            # libcurl caps this to what it supports.
+            c.setopt(pycurl.BUFFERSIZE, 1024 * 1024)
             c.setopt(pycurl.LOW_SPEED_LIMIT, 1000)
             c.setopt(pycurl.LOW_SPEED_TIME, 300)
 
@@ -185,12 +248,10 @@ class CGILookasideCache(object):
             except Exception as e:
                 raise DownloadError(e)
 
-            finally:
-                c.close()
-
         # Get back a new line, after displaying the download progress
-        sys.stdout.write('\n')
-        sys.stdout.flush()
+        if self._progress_line is not None:
+            sys.stdout.write('\n')
+            sys.stdout.flush()
 
         if status != 200:
             self.log.info('Remove downloaded invalid file %s', outfile)
@@ -202,17 +263,23 @@ class CGILookasideCache(object):
         if not self.file_is_valid(outfile, hash, hashtype=hashtype):
             raise DownloadError('%s failed checksum' % filename)
 
-    def remote_file_exists(self, name, filename, hash):
-        """Verify whether a file exists on the lookaside cache
+    def _set_auth_options(self, curl):
+        if self.client_cert is not None:
+            if os.path.exists(self.client_cert):
+                curl.setopt(pycurl.SSLCERT, self.client_cert)
+            else:
+                self.log.warning("Missing certificate: %s", self.client_cert)
 
-        Args:
-            name: The name of the module. (usually the name of the SRPM).
-                  This can include the namespace as well (depending on
-                  what the server side expects).
-            filename: The name of the file to check for.
-            hash: The known good hash of the file.
-        """
+        if self.ca_cert is not None:
+            if os.path.exists(self.ca_cert):
+                curl.setopt(pycurl.CAINFO, self.ca_cert)
+            else:
+                self.log.warning("Missing certificate: %s", self.ca_cert)
+
+        curl.setopt(pycurl.HTTPAUTH, pycurl.HTTPAUTH_GSSNEGOTIATE)
+        curl.setopt(pycurl.USERPWD, ':')
 
+    def _set_check_options(self, curl, name, filename, hash, buf):
         # RHEL 7 ships pycurl that does not accept unicode. When given unicode
         # type it would explode with "unsupported second type in tuple". Let's
         # convert to str just to be sure.
@@ -224,40 +291,11 @@ class CGILookasideCache(object):
                      ('%ssum' % self.hashtype, hash),
                      ('filename', filename)]
 
-        with io.BytesIO() as buf:
-            c = pycurl.Curl()
-            c.setopt(pycurl.URL, self.upload_url)
-            c.setopt(pycurl.WRITEFUNCTION, buf.write)
-            c.setopt(pycurl.HTTPPOST, post_data)
-
-            if self.client_cert is not None:
-                if os.path.exists(self.client_cert):
-                    c.setopt(pycurl.SSLCERT, self.client_cert)
-                else:
-                    self.log.warning("Missing certificate: %s"
-                                     % self.client_cert)
-
-            if self.ca_cert is not None:
-                if os.path.exists(self.ca_cert):
-                    c.setopt(pycurl.CAINFO, self.ca_cert)
-                else:
-                    self.log.warning("Missing certificate: %s", self.ca_cert)
-
-            c.setopt(pycurl.HTTPAUTH, pycurl.HTTPAUTH_GSSNEGOTIATE)
-            c.setopt(pycurl.USERPWD, ':')
-
-            try:
-                c.perform()
-                status = c.getinfo(pycurl.RESPONSE_CODE)
-
-            except Exception as e:
-                raise UploadError(e)
-
-            finally:
-                c.close()
-
-            output = buf.getvalue().strip()
+        curl.setopt(pycurl.URL, self.upload_url)
+        curl.setopt(pycurl.WRITEFUNCTION, buf.write)
+        curl.setopt(pycurl.HTTPPOST, post_data)
 
+    def _check_result(self, filename, status, output):
         if status != 200:
             self.raise_upload_error(status)
 
@@ -274,7 +312,99 @@ class CGILookasideCache(object):
         raise UploadError('Error checking for %s at %s'
                           % (filename, self.upload_url))
 
-    def upload(self, name, filepath, hash):
+    def remote_file_exists(self, name, filename, hash):
+        """Verify whether a file exists on the lookaside cache
+
+        Args:
+            name: The name of the module. (usually the name of the SRPM).
+                  This can include the namespace as well (depending on
+                  what the server side expects).
+            filename: The name of the file to check for.
+            hash: The known good hash of the file.
+        """
+        with io.BytesIO() as buf:
+            c = self.get_curl()
+            self._set_check_options(c, name, filename, hash, buf)
+            self._set_auth_options(c)
+
+            try:
+                c.perform()
+                status = c.getinfo(pycurl.RESPONSE_CODE)
+
+            except Exception as e:
+                raise UploadError(e)
+
+            output = buf.getvalue().strip()
+
+        return self._check_result(filename, status, output)
+
+    def remote_files_exist(self, name, files, max_checks=8):
+        """Verify which of several files exist on the lookaside cache
+
+        The files are checked concurrently, with one request per file, in
+        batches of at most max_checks requests at a time so that a package
+        with many sources does not flood the lookaside cache with connections.
+
+        Subclasses overriding remote_file_exists get it called for each file
+        instead, one after the other.
+
+        Args:
+            name: The name of the module. (usually the name of the SRPM).
+                  This can include the namespace as well (depending on
+                  what the server side expects).
+            files: A list of (filename, hash) tuples to check for.
+            max_checks (int, optional): The maximum number of requests sent
+                at the same time. It defaults to 8.
+
+        Returns:
+            A set of the (filename, hash) tuples which are already available.
+        """
+        if len(files) < 2 or is_overridden(self, CGILookasideCache,
+                                           'remote_file_exists'):
+            return set((filename, hash) for filename, hash in files
+                       if self.remote_file_exists(name, filename, hash))
+
+        existing = set()
+        for i in range(0, len(files), max_checks):
+            existing.update(self._check_files(name, files[i:i + max_checks]))
+        return existing
+
+    def _check_files(self, name, files):
+        multi = pycurl.CurlMulti()
+        checks = []
+        try:
+            for filename, hash in files:
+                c = pycurl.Curl()
+                buf = io.BytesIO()
+                self._set_check_options(c, name, filename, hash, buf)
+                self._set_auth_options(c)
+                multi.add_handle(c)
+                checks.append((filename, hash, c, buf))
+
+            num_handles = len(checks)
+            while num_handles:
+                ret, num_handles = multi.perform()
+                if ret != pycurl.E_CALL_MULTI_PERFORM and num_handles:
+                    multi.select(1.0)
+
+            failed = multi.info_read()[2]
+            if failed:
+                raise UploadError(failed[0][2])
+
+            return set(
+                (filename, hash) for filename, hash, c, buf in checks
+                if self._check_result(filename,
+                                      c.getinfo(pycurl.RESPONSE_CODE),
+                                      buf.getvalue().strip()))
+
+        finally:
+            for filename, hash, c, buf in checks:
+                multi.remove_handle(c)
+                c.close()
+                buf.close()
+            multi.close()
+
+    def upload(self, name, filepath, hash, check_remote=True):
         """Upload a source file
 
         Args:
@@ -283,6 +413,12 @@ class CGILookasideCache(object):
                         what the server side expects).
             filepath (str): The full path to the file to upload.
             hash (str): The known good hash of the file.
+            check_remote (bool, optional): Whether to check first if the file
+                is already uploaded. Callers which already know it is not,
+                e.g from remote_files_exist, can pass False to save a request.
+                It defaults to True. Commands.upload only passes it when
+                upload is not overridden, so subclasses keeping the former
+                signature still work.
         """
         filename = os.path.basename(filepath)
 
@@ -293,7 +429,7 @@ class CGILookasideCache(object):
             if isinstance(filepath, six.text_type):
                 filepath = filepath.encode('utf-8')
 
-        if self.remote_file_exists(name, filename, hash):
+        if check_remote and self.remote_file_exists(name, filename, hash):
             self.log.info("File already uploaded: %s", filepath)
             return
 
@@ -303,27 +439,14 @@ class CGILookasideCache(object):
                      ('file', (pycurl.FORM_FILE, filepath))]
 
         with io.BytesIO() as buf:
-            c = pycurl.Curl()
+            c = self.get_curl()
             c.setopt(pycurl.URL, self.upload_url)
             c.setopt(pycurl.NOPROGRESS, False)
             c.setopt(pycurl.PROGRESSFUNCTION, self.print_progress)
+            self._progress_line = None
             c.setopt(pycurl.WRITEFUNCTION, buf.write)
             c.setopt(pycurl.HTTPPOST, post_data)
-
-            if self.client_cert is not None:
-                if os.path.exists(self.client_cert):
-                    c.setopt(pycurl.SSLCERT, self.client_cert)
-                else:
-                    self.log.warning("Missing certificate: %s", self.client_cert)
-
-            if self.ca_cert is not None:
-                if os.path.exists(self.ca_cert):
-                    c.setopt(pycurl.CAINFO, self.ca_cert)
-                else:
-                    self.log.warning("Missing certificate: %s", self.ca_cert)
-
-            c.setopt(pycurl.HTTPAUTH, pycurl.HTTPAUTH_GSSNEGOTIATE)
-            c.setopt(pycurl.USERPWD, ':')
+            self._set_auth_options(c)
 
             try:
                 c.perform()
@@ -332,14 +455,12 @@ class CGILookasideCache(object):
             except Exception as e:
                 raise UploadError(e)
 
-            finally:
-                c.close()
-
             output = buf.getvalue().strip()
 
         # Get back a new line, after displaying the download progress
-        sys.stdout.write('\n')
-        sys.stdout.flush()
+        if self._progress_line is not None:
+            sys.stdout.write('\n')
+            sys.stdout.flush()
 
         if status != 200:
             self.raise_upload_error(status)
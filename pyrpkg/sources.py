@@ -17,15 +17,10 @@ entries, and write these entries to the file in the proper format.
 
 
 import os
-import re
 
 from .errors import HashtypeMixingError, MalformedLineError
 
 
-LINE_PATTERN = re.compile(
-    r'^(?P<hashtype>[^ ]+?) \((?P<file>[^ )]+?)\) = (?P<hash>[^ ]+?)$')
-
-
 class SourcesFile(object):
     def __init__(self, sourcesfile, entry_type, replace=False):
         self.sourcesfile = sourcesfile
@@ -37,11 +32,13 @@ class SourcesFile(object):
             if not os.path.exists(sourcesfile):
                 return
 
+            seen = set()
             with open(sourcesfile) as f:
                 for line in f:
                     entry = self.parse_line(line)
 
-                    if entry and entry not in self.entries:
+                    if entry and entry not in seen:
+                        seen.add(entry)
                         self.entries.append(entry)
 
     def __contains__(self, filename):
@@ -56,10 +53,13 @@ class SourcesFile(object):
         if not stripped:
             return
 
-        m = LINE_PATTERN.match(stripped)
-        if m is not None:
-            return self.entry_type(m.group('hashtype'), m.group('file'),
-                                   m.group('hash'))
+        # Split "hashtype (file) = hash" on its separators. None of the
+        # fields can contain a space, and the file cannot contain a ")".
+        hashtype, sep, rest = stripped.partition(' (')
+        file, sep, hash = rest.partition(') = ')
+        if (sep and hashtype and file and hash and ')' not in file and
+                ' ' not in hashtype and ' ' not in file and ' ' not in hash):
+            return self.entry_type(hashtype, file, hash)
 
         # Try falling back on the old format
         try:
@@ -84,11 +84,12 @@ class SourcesFile(object):
 
     def write(self):
         with open(self.sourcesfile, 'w') as f:
-            for entry in self.entries:
-                f.write(str(entry))
+            f.write(''.join(str(entry) for entry in self.entries))
 
 
 class SourceFileEntry(object):
+    __slots__ = ('hashtype', 'hash', 'file')
+
     def __init__(self, hashtype, file, hash):
         self.hashtype = hashtype.lower()
         self.hash = hash
@@ -101,8 +102,13 @@ class SourceFileEntry(object):
         return ((self.hashtype, self.hash, self.file) ==
                 (other.hashtype, other.hash, other.file))
 
+    def __hash__(self):
+        return hash((self.hashtype, self.hash, self.file))
+
 
 class BSDSourceFileEntry(SourceFileEntry):
+    __slots__ = ()
+
     def __str__(self):
         return '%s (%s) = %s\n' % (self.hashtype.upper(), self.file,
                                    self.hash)
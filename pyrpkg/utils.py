@@ -74,6 +74,26 @@ def warn_deprecated(clsname, oldname, newname):
         "Please use %s.%s instead.\n" % (clsname, oldname, clsname, newname))
 
 
+def is_overridden(obj, cls, name):
+    """Check whether the class of an object overrides a method
+
+    Args:
+        obj: The object to check.
+        cls (type): The base class defining the method.
+        name (str): The name of the method.
+
+    Returns:
+        True if the class of obj does not use the method defined by cls,
+        False otherwise.
+    """
+    method = getattr(type(obj), name, None)
+    if method is None:
+        return True
+
+    return (six.get_unbound_function(method) is not
+            six.get_unbound_function(getattr(cls, name)))
+
+
 def _log_value(log_func, value, level, indent, suffix=''):
     offset = ' ' * level * indent
     log_func(''.join([offset, str(value), suffix]))
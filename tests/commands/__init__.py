@@ -1,3 +1,4 @@
+import atexit
 import os
 import shutil
 import subprocess
@@ -5,11 +6,96 @@ import sys
 import tempfile
 import unittest
 
+from contextlib import contextmanager
+
+import git
+import pyrpkg
+
+from mock import patch
+from six.moves import cStringIO as StringIO
+
+
+# Keep the git commands run by the tests away from the user's and system's
+# configuration (signing, hooks, credential prompts), and from background gc.
+GIT_ENV = {
+    'GIT_CONFIG_NOSYSTEM': '1',
+    'GIT_CONFIG_GLOBAL': os.devnull,
+    'GIT_CONFIG_COUNT': '2',
+    'GIT_CONFIG_KEY_0': 'gc.auto',
+    'GIT_CONFIG_VALUE_0': '0',
+    'GIT_CONFIG_KEY_1': 'commit.gpgsign',
+    'GIT_CONFIG_VALUE_1': 'false',
+    'GIT_OPTIONAL_LOCKS': '0',
+    'GIT_TERMINAL_PROMPT': '0',
+}
+
+# Every directory made by these tests lives under this root. Each test removes
+# its own directory, the root and the template repos are removed at exit.
+_tests_root = tempfile.mkdtemp(prefix='rpkg-tests.')
+atexit.register(shutil.rmtree, _tests_root, ignore_errors=True)
+
+# Bare repositories made by make_new_git, keyed by their tuple of branches.
+# They are only built once, then copied for each test which needs them.
+_template_repos = {}
+
+
+@contextmanager
+def hijack_stdout():
+    old_stdout = sys.stdout
+    out = StringIO()
+    sys.stdout = out
+    try:
+        yield out
+    finally:
+        sys.stdout.flush()
+        sys.stdout = old_stdout
+        out.seek(0)
+
+
+def _touch(path):
+    os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644))
+
+
+def _make_template_repo(branches):
+    path = os.path.join(tempfile.mkdtemp(prefix='template.',
+                                         dir=_tests_root),
+                        'template.git')
+
+    # Create a bare Git repository
+    bare_repo = git.Repo.init(path, mkdir=True, bare=True)
+
+    # Clone it, and do the minimal Dist Git setup
+    clonedir = os.path.join(os.path.dirname(path), 'clone')
+    repo = bare_repo.clone(clonedir)
+    for filename in ('.gitignore', 'sources'):
+        _touch(os.path.join(clonedir, filename))
+    config = repo.config_writer()
+    config.set_value('user', 'name', 'tester')
+    config.set_value('user', 'email', 'tester@example.com')
+    config.release()
+    repo.index.add(['.gitignore', 'sources'])
+    repo.index.commit('Initial setup of the repo')
+    repo.git.push('origin', 'master')
+
+    # Add the requested branches
+    for branch in branches:
+        repo.create_head(branch)
+        repo.git.push('origin', branch)
+
+    # Drop the clone
+    shutil.rmtree(clonedir)
+
+    return path
+
 
 class CommandTestCase(unittest.TestCase):
     def setUp(self):
+        git_env = patch.dict('os.environ', GIT_ENV)
+        git_env.start()
+        self.addCleanup(git_env.stop)
+
         self.origin_dir = os.getcwd()
-        self.path = tempfile.mkdtemp(prefix='rpkg-tests.')
+        self.path = tempfile.mkdtemp(dir=_tests_root)
         self.gitroot = os.path.join(self.path, 'gitroot')
 
         self.module = 'module1'
@@ -45,48 +131,27 @@ class CommandTestCase(unittest.TestCase):
         if branches is None:
             branches = []
 
-        # Create a bare Git repository
-        moduledir = os.path.join(self.gitroot, module)
-        os.makedirs(moduledir)
-        subprocess.check_call(['git', 'init', '--bare'], cwd=moduledir,
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        # Clone it, and do the minimal Dist Git setup
-        cloneroot = os.path.join(self.path, 'clonedir')
-        os.makedirs(cloneroot)
-        subprocess.check_call(['git', 'clone', 'file://%s' % moduledir],
-                              cwd=cloneroot, stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE)
-        clonedir = os.path.join(cloneroot, module.split('/')[-1])
-        open(os.path.join(clonedir, '.gitignore'), 'w').close()
-        open(os.path.join(clonedir, 'sources'), 'w').close()
-        subprocess.check_call(['git', 'config', 'user.name', 'tester'],
-                              cwd=clonedir,
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        subprocess.check_call(['git', 'config', 'user.email', 'tester@example.com'],
-                              cwd=clonedir,
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        subprocess.check_call(['git', 'add', '.gitignore', 'sources'],
-                              cwd=clonedir, stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE)
-        subprocess.check_call(['git', 'commit', '-m',
-                               'Initial setup of the repo'], cwd=clonedir,
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        subprocess.check_call(['git', 'push', 'origin', 'master'],
-                              cwd=clonedir, stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE)
-
-        # Add the requested branches
-        for branch in branches:
-            subprocess.check_call(['git', 'branch', branch], cwd=clonedir,
-                                  stdout=subprocess.PIPE,
-                                  stderr=subprocess.PIPE)
-            subprocess.check_call(['git', 'push', 'origin', branch],
-                                  cwd=clonedir, stdout=subprocess.PIPE,
-                                  stderr=subprocess.PIPE)
-
-        # Drop the clone
-        shutil.rmtree(cloneroot)
+        key = tuple(branches)
+        if key not in _template_repos:
+            _template_repos[key] = _make_template_repo(branches)
+
+        shutil.copytree(_template_repos[key],
+                        os.path.join(self.gitroot, module))
+
+    def make_commands(self, path=None, **kwargs):
+        """Make a Commands object with the settings of this test case
+
+        This is not a test method.
+
+        :param str path: the path Commands works on. Defaults to self.path.
+        :param kwargs: additional keyword arguments passed to Commands.
+        """
+        return pyrpkg.Commands(path or self.path, self.lookaside,
+                               self.lookasidehash, self.lookaside_cgi,
+                               self.gitbaseurl, self.anongiturl, self.branchre,
+                               self.kojiprofile, self.build_client,
+                               user=self.user, dist=self.dist,
+                               target=self.target, quiet=self.quiet, **kwargs)
 
     def config_repo(self, repo_path):
         subprocess.check_call(['git', 'config', 'user.name', 'tester'], cwd=repo_path)
@@ -99,30 +164,11 @@ class CommandTestCase(unittest.TestCase):
                                 stdout=subprocess.PIPE,
                                 universal_newlines=True).communicate()[0]
 
-        for line in tags.split('\n'):
+        for line in tags.splitlines():
             if not line:
                 continue
 
-            tokens = [x for x in line.split() if x]
-            result.append([tokens[0], ' '.join(tokens[1:])])
+            tokens = line.split(None, 1)
+            result.append([tokens[0], tokens[1].strip() if len(tokens) > 1 else ''])
 
         return result
-
-    def hijack_stdout(self):
-        class cm(object):
-            def __enter__(self):
-                from six.moves import cStringIO as StringIO
-
-                self.old_stdout = sys.stdout
-                self.out = StringIO()
-                sys.stdout = self.out
-
-                return self.out
-
-            def __exit__(self, *args):
-                sys.stdout.flush()
-                sys.stdout = self.old_stdout
-
-                self.out.seek(0)
-
-        return cm()
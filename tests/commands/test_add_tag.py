@@ -1,5 +1,7 @@
 import os
 
+from pyrpkg import rpkgError
+
 from . import CommandTestCase
 
 
@@ -22,12 +24,7 @@ class CommandAddTagTestCase(CommandTestCase):
         tag = 'v1.0'
         message = 'This is a release'
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -49,12 +46,7 @@ class CommandAddTagTestCase(CommandTestCase):
         tag = 'v1.0'
         message = 'This is a release'
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -71,12 +63,7 @@ class CommandAddTagTestCase(CommandTestCase):
         tag = 'v1.0'
         message = 'This is a release'
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -98,12 +85,7 @@ class CommandAddTagTestCase(CommandTestCase):
         tag = 'v1.0'
         message = 'This is a release'
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -116,7 +98,7 @@ class CommandAddTagTestCase(CommandTestCase):
         def raises():
             cmd.add_tag(tag, message='No, THIS is a release')
 
-        self.assertRaises(pyrpkg.rpkgError, raises)
+        self.assertRaises(rpkgError, raises)
 
     def test_add_tag_force_replace_existing(self):
         self.make_new_git(self.module)
@@ -124,12 +106,7 @@ class CommandAddTagTestCase(CommandTestCase):
         tag = 'v1.0'
         message = 'This is a release'
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -150,12 +127,7 @@ class CommandAddTagTestCase(CommandTestCase):
         tags = [['v1.0', 'This is a release'],
                 ['v2.0', 'This is another release']]
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -1,9 +1,10 @@
 import os
-import shutil
 import tempfile
 
 import git
 
+from pyrpkg import rpkgError
+
 from . import CommandTestCase
 
 
@@ -17,12 +18,7 @@ class CommandCloneTestCase(CommandTestCase):
     def test_clone_anonymous(self):
         self.make_new_git(self.module)
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone_config = CLONE_CONFIG
         cmd.clone(self.module, anon=True)
 
@@ -37,12 +33,7 @@ class CommandCloneTestCase(CommandTestCase):
         self.module = 'rpms/module1'
         self.make_new_git(self.module)
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet, distgit_namespaced=True)
+        cmd = self.make_commands(distgit_namespaced=True)
         cmd.clone_config = CLONE_CONFIG
         cmd.clone(self.module, anon=True)
 
@@ -56,14 +47,9 @@ class CommandCloneTestCase(CommandTestCase):
     def test_clone_anonymous_with_path(self):
         self.make_new_git(self.module)
 
-        altpath = tempfile.mkdtemp(prefix='rpkg-tests.')
+        altpath = tempfile.mkdtemp(dir=self.path)
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True, path=altpath)
 
         moduledir = os.path.join(altpath, self.module)
@@ -72,18 +58,11 @@ class CommandCloneTestCase(CommandTestCase):
         notmoduledir = os.path.join(self.path, self.module)
         self.assertFalse(os.path.isdir(os.path.join(notmoduledir, '.git')))
 
-        shutil.rmtree(altpath)
-
     def test_clone_anonymous_with_branch(self):
         self.make_new_git(self.module,
                           branches=['rpkg-tests-1', 'rpkg-tests-2'])
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True, branch='rpkg-tests-1')
 
         with open(os.path.join(
@@ -93,12 +72,7 @@ class CommandCloneTestCase(CommandTestCase):
     def test_clone_anonymous_with_bare_dir(self):
         self.make_new_git(self.module)
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True, bare_dir='%s.git' % self.module)
 
         clonedir = os.path.join(self.path, '%s.git' % self.module)
@@ -109,28 +83,18 @@ class CommandCloneTestCase(CommandTestCase):
         self.make_new_git(self.module,
                           branches=['rpkg-tests-1', 'rpkg-tests-2'])
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
 
         def raises():
             cmd.clone(self.module, anon=True, branch='rpkg-tests-1',
                       bare_dir='test.git')
-        self.assertRaises(pyrpkg.rpkgError, raises)
+        self.assertRaises(rpkgError, raises)
 
     def test_clone_into_dir(self):
         self.make_new_git(self.module,
                           branches=['rpkg-tests-1', 'rpkg-tests-2'])
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(
             self.module, anon=True, branch='rpkg-tests-1', target='new_clone')
 
@@ -143,12 +107,7 @@ class CommandCloneTestCase(CommandTestCase):
         self.make_new_git(self.module,
                           branches=['rpkg-tests-1', 'rpkg-tests-2'])
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet, distgit_namespaced=True)
+        cmd = self.make_commands(distgit_namespaced=True)
         cmd.clone(
             self.module, anon=True, branch='rpkg-tests-1', target='new_clone')
 
@@ -1,5 +1,7 @@
 import os
 
+from pyrpkg import rpkgError
+
 from . import CommandTestCase
 
 
@@ -10,12 +12,7 @@ class CommandDeleteTagTestCase(CommandTestCase):
         tag = 'v1.0'
         message = 'This is a release'
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -36,12 +33,7 @@ class CommandDeleteTagTestCase(CommandTestCase):
 
         tag = 'v1.0'
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -51,4 +43,4 @@ class CommandDeleteTagTestCase(CommandTestCase):
         # Try deleting an inexistent tag
         def raises():
             cmd.delete_tag(tag)
-        self.assertRaises(pyrpkg.rpkgError, raises)
+        self.assertRaises(rpkgError, raises)
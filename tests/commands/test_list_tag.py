@@ -1,25 +1,20 @@
 import os
 
-from . import CommandTestCase
+from . import CommandTestCase, hijack_stdout
 
 
 class CommandListTagTestCase(CommandTestCase):
     def test_list_tag_no_tags(self):
         self.make_new_git(self.module)
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
         cmd.path = moduledir
         self.config_repo(cmd.path)
 
-        with self.hijack_stdout() as out:
+        with hijack_stdout() as out:
             cmd.list_tag()
 
         self.assertEqual(out.read().strip(), '')
@@ -30,12 +25,7 @@ class CommandListTagTestCase(CommandTestCase):
         tags = [['v1.0', 'This is a release'],
                 ['v2.0', 'This is another release']]
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -45,7 +35,7 @@ class CommandListTagTestCase(CommandTestCase):
         for tag, message in tags:
             cmd.add_tag(tag, message=message)
 
-        with self.hijack_stdout() as out:
+        with hijack_stdout() as out:
             cmd.list_tag()
 
         result = out.read().strip().split('\n')
@@ -58,12 +48,7 @@ class CommandListTagTestCase(CommandTestCase):
         tags = [['v1.0', 'This is a release'],
                 ['v2.0', 'This is another release']]
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -73,7 +58,7 @@ class CommandListTagTestCase(CommandTestCase):
         for tag, message in tags:
             cmd.add_tag(tag, message=message)
 
-        with self.hijack_stdout() as out:
+        with hijack_stdout() as out:
             cmd.list_tag(tagname='v1.0')
 
         result = out.read().strip().split('\n')
@@ -86,12 +71,7 @@ class CommandListTagTestCase(CommandTestCase):
         tags = [['v1.0', 'This is a release'],
                 ['v2.0', 'This is another release']]
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -101,7 +81,7 @@ class CommandListTagTestCase(CommandTestCase):
         for tag, message in tags:
             cmd.add_tag(tag, message=message)
 
-        with self.hijack_stdout() as out:
+        with hijack_stdout() as out:
             cmd.list_tag(tagname='v1.1')
 
         result = out.read().strip().split('\n')
@@ -114,12 +94,7 @@ class CommandListTagTestCase(CommandTestCase):
         tags = [['v1.0', 'This is a release'],
                 ['v2.0', 'This is another release']]
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -129,7 +104,7 @@ class CommandListTagTestCase(CommandTestCase):
         for tag, message in tags:
             cmd.add_tag(tag, message=message)
 
-        with self.hijack_stdout() as out:
+        with hijack_stdout() as out:
             cmd.list_tag(tagname='v1*')
 
         result = out.read().strip().split('\n')
@@ -142,12 +117,7 @@ class CommandListTagTestCase(CommandTestCase):
         tags = [['v1.0', 'This is a release'],
                 ['v2.0', 'This is another release']]
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside, self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone(self.module, anon=True)
 
         moduledir = os.path.join(self.path, self.module)
@@ -157,7 +127,7 @@ class CommandListTagTestCase(CommandTestCase):
         for tag, message in tags:
             cmd.add_tag(tag, message=message)
 
-        with self.hijack_stdout() as out:
+        with hijack_stdout() as out:
             cmd.list_tag(tagname='*')
 
         result = out.read().strip().split('\n')
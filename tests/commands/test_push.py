@@ -3,6 +3,8 @@
 import os
 import git
 
+from pyrpkg.sources import SourcesFile
+
 from . import CommandTestCase
 
 
@@ -30,42 +32,23 @@ CLONE_CONFIG = '''
 
 class CommandPushTestCase(CommandTestCase):
 
-    def setUp(self):
-        # Tests within this case would change working directory. Changing back
-        # to original directory to avoid any potential problems.
-        self.original_dir = os.path.abspath(os.curdir)
-        super(CommandPushTestCase, self).setUp()
-
-    def tearDown(self):
-        os.chdir(self.original_dir)
-        super(CommandPushTestCase, self).tearDown()
-
     def test_push_outside_repo(self):
         """push from outside repo with --path option"""
 
         self.make_new_git(self.module)
 
-        import pyrpkg
-        cmd = pyrpkg.Commands(self.path, self.lookaside,
-                              self.lookasidehash,
-                              self.lookaside_cgi, self.gitbaseurl,
-                              self.anongiturl, self.branchre, self.kojiprofile,
-                              self.build_client, self.user, self.dist,
-                              self.target, self.quiet)
+        cmd = self.make_commands()
         cmd.clone_config = CLONE_CONFIG
         cmd.clone(self.module, anon=True)
         cmd.path = os.path.join(self.path, self.module)
-        os.chdir(os.path.join(self.path, self.module))
 
-        spec_file = 'module.spec'
+        spec_file = os.path.join(cmd.path, 'module.spec')
         with open(spec_file, 'w') as f:
             f.write(SPECFILE_TEMPLATE % '')
 
         cmd.repo.index.add([spec_file])
         cmd.repo.index.commit("add SPEC")
 
-        # Now, change directory to parent and test the push
-        os.chdir(self.path)
         cmd.push()
 
 
@@ -76,21 +59,13 @@ class TestPushWithPatches(CommandTestCase):
 
         self.make_new_git(self.module)
 
-        import pyrpkg
-        self.cmd = pyrpkg.Commands(self.path, self.lookaside,
-                                   self.lookasidehash,
-                                   self.lookaside_cgi, self.gitbaseurl,
-                                   self.anongiturl, self.branchre,
-                                   self.kojiprofile,
-                                   self.build_client, self.user, self.dist,
-                                   self.target, self.quiet)
+        self.cmd = self.make_commands()
         self.cmd.clone_config = CLONE_CONFIG
         self.cmd.clone(self.module, anon=True)
         self.cmd.path = os.path.join(self.path, self.module)
-        os.chdir(os.path.join(self.path, self.module))
 
         # Track SPEC and a.patch in git
-        spec_file = 'module.spec'
+        spec_file = os.path.join(self.cmd.path, 'module.spec')
         with open(spec_file, 'w') as f:
             f.write(SPECFILE_TEMPLATE % '''Patch0: a.patch
 Patch1: b.path
@@ -99,14 +74,14 @@ Patch3: d.path
 ''')
 
         for patch_file in ('a.patch', 'b.patch', 'c.patch', 'd.patch'):
-            with open(patch_file, 'w') as f:
+            with open(os.path.join(self.cmd.path, patch_file), 'w') as f:
                 f.write(patch_file)
 
         # Track c.patch in sources
-        from pyrpkg.sources import SourcesFile
         sources_file = SourcesFile(self.cmd.sources_filename,
                                    self.cmd.source_entry_type)
-        file_hash = self.cmd.lookasidecache.hash_file('c.patch')
+        file_hash = self.cmd.lookasidecache.hash_file(
+            os.path.join(self.cmd.path, 'c.patch'))
         sources_file.add_entry(self.cmd.lookasidehash, 'c.patch', file_hash)
         sources_file.write()
 
@@ -132,6 +107,6 @@ Patch3: d.path
         self.assertTrue('d.patch' not in git_tree)
 
         sources_content = origin_repo.git.show('master:sources').strip()
-        with open('sources', 'r') as f:
+        with open(self.cmd.sources_filename, 'r') as f:
             expected_sources_content = f.read().strip()
         self.assertEqual(expected_sources_content, sources_content)
@@ -8,6 +8,7 @@ try:
     import rpmfluff
 except ImportError:
     rpmfluff = None
+import shlex
 import shutil
 import six
 import subprocess
@@ -24,7 +25,9 @@ from six.moves import configparser
 from six.moves import StringIO
 
 import git
+import pyrpkg
 import pyrpkg.cli
+import pyrpkg.utils
 
 try:
     import openidc_client
@@ -55,6 +58,11 @@ package demo for testing
 '''
 
 
+def split_rpmdefines(rpmdefines):
+    """Split shell quoted rpm defines as rpmbuild gets them without a shell"""
+    return [arg for define in rpmdefines for arg in shlex.split(define)]
+
+
 class CliTestCase(CommandTestCase):
 
     def new_cli(self, cfg=None):
@@ -86,6 +94,62 @@ class CliTestCase(CommandTestCase):
                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
 
+class TestSetupSubparsers(CliTestCase):
+
+    def test_build_common_without_md5_common(self):
+        class Client(pyrpkg.cli.cliClient):
+            def setup_subparsers(self):
+                self.register_build_common()
+                self.register_build()
+
+        config = configparser.SafeConfigParser()
+        config.read(config_file)
+
+        with patch('sys.argv', new=['rpkg', 'build', '--md5']):
+            client = Client(config, name='rpkg')
+            client.parse_cmdline()
+        self.assertEqual('md5', client.args.hash)
+
+    def test_srpm_and_mockbuild_without_build_common(self):
+        class Client(pyrpkg.cli.cliClient):
+            def setup_subparsers(self):
+                self.register_srpm()
+                self.register_mockbuild()
+
+        config = configparser.SafeConfigParser()
+        config.read(config_file)
+
+        for command in ('srpm', 'mockbuild'):
+            with patch('sys.argv', new=['rpkg', command, '--md5']):
+                client = Client(config, name='rpkg')
+                client.parse_cmdline()
+            self.assertEqual('md5', client.args.hash)
+
+
+class TestSite(CliTestCase):
+
+    def new_client(self):
+        config = configparser.SafeConfigParser()
+        config.read(config_file)
+
+        with patch('sys.argv', new=['rpkg', 'verrel']):
+            return pyrpkg.cli.cliClient(config, name='rpkg')
+
+    def test_load_pyrpkg_by_default(self):
+        client = self.new_client()
+        client.do_imports()
+        self.assertEqual(pyrpkg, client.site)
+
+    def test_load_given_site(self):
+        client = self.new_client()
+        client.do_imports(site='pyrpkg.utils')
+        self.assertEqual(pyrpkg.utils, client.site)
+
+    def test_unknown_site(self):
+        six.assertRaisesRegex(self, Exception, 'Unknown site unknown_site',
+                              self.new_client().do_imports, site='unknown_site')
+
+
 class TestModuleNameOption(CliTestCase):
 
     def get_cmd(self, module_name, cfg=None):
@@ -475,9 +539,9 @@ class TestSrpm(CliTestCase):
             cli = self.new_cli()
             cli.srpm()
 
-        expected_cmd = ['rpmbuild'] + cli.cmd.rpmdefines + \
+        expected_cmd = ['rpmbuild'] + split_rpmdefines(cli.cmd.rpmdefines) + \
             ['--nodeps', '-bs', os.path.join(cli.cmd.path, cli.cmd.spec)]
-        _run_command.assert_called_once_with(expected_cmd, shell=True)
+        _run_command.assert_called_once_with(expected_cmd)
 
 
 class TestCompile(CliTestCase):
@@ -525,8 +589,9 @@ class TestPrep(CliTestCase):
             cli.prep()
 
         spec = os.path.join(cli.cmd.path, cli.cmd.spec)
-        rpmbuild = ['rpmbuild'] + cli.cmd.rpmdefines + ['--nodeps', '-bp', spec]
-        _run_command.assert_called_once_with(rpmbuild, shell=True)
+        rpmbuild = ['rpmbuild'] + split_rpmdefines(cli.cmd.rpmdefines) + \
+            ['--nodeps', '-bp', spec]
+        _run_command.assert_called_once_with(rpmbuild)
 
     @patch('pyrpkg.Commands._run_command')
     def test_prep_with_options(self, _run_command):
@@ -540,10 +605,10 @@ class TestPrep(CliTestCase):
             cli.prep()
 
         spec = os.path.join(cli.cmd.path, cli.cmd.spec)
-        rpmbuild = ['rpmbuild'] + cli.cmd.rpmdefines + \
-            ["--define '_builddir %s'" % builddir, '--target', 'i686', '--quiet', '--nodeps',
+        rpmbuild = ['rpmbuild'] + split_rpmdefines(cli.cmd.rpmdefines) + \
+            ['--define', '_builddir %s' % builddir, '--target', 'i686', '--quiet', '--nodeps',
              '-bp', spec]
-        _run_command.assert_called_once_with(rpmbuild, shell=True)
+        _run_command.assert_called_once_with(rpmbuild)
 
 
 class TestInstall(CliTestCase):
@@ -632,8 +697,8 @@ class TestVerifyFiles(CliTestCase):
             cli.verify_files()
 
         spec = os.path.join(cli.cmd.path, cli.cmd.spec)
-        rpmbuild = ['rpmbuild'] + cli.cmd.rpmdefines + ['-bl', spec]
-        _run_command.assert_called_once_with(rpmbuild, shell=True)
+        rpmbuild = ['rpmbuild'] + split_rpmdefines(cli.cmd.rpmdefines) + ['-bl', spec]
+        _run_command.assert_called_once_with(rpmbuild)
 
     @patch('pyrpkg.Commands._run_command')
     def test_verify_files_with_options(self, _run_command):
@@ -647,9 +712,9 @@ class TestVerifyFiles(CliTestCase):
             cli.verify_files()
 
         spec = os.path.join(cli.cmd.path, cli.cmd.spec)
-        rpmbuild = ['rpmbuild'] + cli.cmd.rpmdefines + \
-            ["--define '_builddir %s'" % builddir, '--quiet', '-bl', spec]
-        _run_command.assert_called_once_with(rpmbuild, shell=True)
+        rpmbuild = ['rpmbuild'] + split_rpmdefines(cli.cmd.rpmdefines) + \
+            ['--define', '_builddir %s' % builddir, '--quiet', '-bl', spec]
+        _run_command.assert_called_once_with(rpmbuild)
 
 
 class TestVerrel(CliTestCase):
@@ -780,6 +845,17 @@ class TestUnusedPatches(CliTestCase):
         expected_patches = [os.path.basename(patch_file) for patch_file in self.patches]
         self.assertEqual('\n'.join(expected_patches), output)
 
+    @patch('sys.stdout', new=StringIO())
+    def test_list_no_unused_patches(self):
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path, 'unused-patches']
+
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            with patch('pyrpkg.Commands.unused_patches', return_value=[]):
+                cli.unused_patches()
+
+        self.assertEqual('\n', sys.stdout.getvalue())
+
 
 class TestDiff(CliTestCase):
 
@@ -792,28 +868,25 @@ class TestDiff(CliTestCase):
         self.make_changes()
 
     @patch('pyrpkg.Commands._run_command')
-    @patch('pyrpkg.os.chdir')
-    def test_diff(self, chdir, _run_command):
+    def test_diff(self, _run_command):
         cli_cmd = ['rpkg', '--path', self.cloned_repo_path, 'diff']
 
         with patch('sys.argv', new=cli_cmd):
             cli = self.new_cli()
             cli.diff()
 
-        self.assertEqual(2, chdir.call_count)
-        _run_command.assert_called_once_with(['git', 'diff'])
+        _run_command.assert_called_once_with(['git', 'diff'], cwd=self.cloned_repo_path)
 
     @patch('pyrpkg.Commands._run_command')
-    @patch('pyrpkg.os.chdir')
-    def test_diff_cached(self, chdir, _run_command):
+    def test_diff_cached(self, _run_command):
         cli_cmd = ['rpkg', '--path', self.cloned_repo_path, 'diff', '--cached']
 
         with patch('sys.argv', new=cli_cmd):
             cli = self.new_cli()
             cli.diff()
 
-        self.assertEqual(2, chdir.call_count)
-        _run_command.assert_called_once_with(['git', 'diff', '--cached'])
+        _run_command.assert_called_once_with(['git', 'diff', '--cached'],
+                                             cwd=self.cloned_repo_path)
 
 
 class TestGimmeSpec(CliTestCase):
@@ -987,11 +1060,20 @@ class LookasideCacheMock(object):
 
     def init_lookaside_cache(self):
         self.lookasidecache_storage = tempfile.mkdtemp('rpkg-tests-lookasidecache-storage-')
+        self.remote_files_exist_patcher = patch(
+            'pyrpkg.lookaside.CGILookasideCache.remote_files_exist',
+            new=self.lookasidecache_remote_files_exist)
+        self.remote_files_exist_patcher.start()
 
     def destroy_lookaside_cache(self):
+        self.remote_files_exist_patcher.stop()
         shutil.rmtree(self.lookasidecache_storage)
 
-    def lookasidecache_upload(self, module_name, filepath, hash):
+    def lookasidecache_remote_files_exist(self, name, files):
+        return set((filename, hash) for filename, hash in files
+                   if os.path.exists(os.path.join(self.lookasidecache_storage, filename)))
+
+    def lookasidecache_upload(self, module_name, filepath, hash, check_remote=True):
         filename = os.path.basename(filepath)
         storage_filename = os.path.join(self.lookasidecache_storage, filename)
         with open(storage_filename, 'w') as fout:
@@ -1050,6 +1132,56 @@ class TestUpload(LookasideCacheMock, CliTestCase):
         self.assertTrue('Changes not staged for commit:' not in git_status)
         self.assertTrue('Changes to be committed:' in git_status)
 
+    def test_upload_with_overridden_lookaside_upload(self):
+        testcase = self
+
+        class LookasideCache(pyrpkg.lookaside.CGILookasideCache):
+            # The signature of upload before check_remote was added
+            def upload(self, name, filepath, hash):
+                testcase.lookasidecache_upload(name, filepath, hash)
+
+        lookasidecache = LookasideCache('md5', '_', '_')
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path, 'upload', self.readme_patch]
+
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            with patch('pyrpkg.Commands.lookasidecache',
+                       new_callable=PropertyMock, return_value=lookasidecache):
+                with patch.object(lookasidecache, 'remote_files_exist') as remote_files_exist:
+                    cli.upload()
+
+        # The overridden upload checks the lookaside cache by itself
+        remote_files_exist.assert_not_called()
+        self.assertFilesUploaded(['readme.patch'])
+
+    def test_report_all_missing_files(self):
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path, 'upload',
+                   self.readme_patch, 'missing-1.patch', 'missing-2.patch']
+
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            try:
+                cli.upload()
+            except Exception as e:
+                self.assertEqual('Paths do not exist or are not files: '
+                                 'missing-1.patch, missing-2.patch', str(e))
+            else:
+                self.fail('Missing files are not reported.')
+
+    def test_report_missing_file(self):
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path, 'upload',
+                   self.readme_patch, 'missing-1.patch']
+
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            try:
+                cli.upload()
+            except Exception as e:
+                self.assertEqual('Path does not exist or is not a file: '
+                                 'missing-1.patch', str(e))
+            else:
+                self.fail('Missing file is not reported.')
+
     def test_append_to_sources(self):
         cli_cmd = ['rpkg', '--path', self.cloned_repo_path, 'upload', self.readme_patch]
         with patch('sys.argv', new=cli_cmd):
@@ -1125,6 +1257,80 @@ class TestSources(LookasideCacheMock, CliTestCase):
 
         self.assertFilesExist(['readme.patch'], search_dir=self.cloned_repo_path)
 
+    def test_skip_downloaded_sources(self):
+        hotfix_patch = os.path.join(self.cloned_repo_path, 'hotfix.patch')
+        self.write_file(hotfix_patch, content='+Hotfix')
+
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path, 'upload', hotfix_patch]
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            with patch('pyrpkg.lookaside.CGILookasideCache.upload', new=self.lookasidecache_upload):
+                cli.upload()
+        os.remove(hotfix_patch)
+
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path,
+                   'sources', '--outdir', self.cloned_repo_path]
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            with patch('pyrpkg.lookaside.CGILookasideCache.download') as download:
+                cli.sources()
+
+        self.assertEqual(1, download.call_count)
+        self.assertEqual('hotfix.patch', download.call_args[0][1])
+        # It was already checked, download must not hash it again
+        self.assertFalse(download.call_args[1]['check_local'])
+
+    def test_download_with_overridden_lookaside_download(self):
+        class LookasideCache(pyrpkg.lookaside.CGILookasideCache):
+            # Extra arguments are used to build the download URL
+            def download(self, name, filename, hash, outfile, hashtype=None, **kwargs):
+                downloads.append((filename, kwargs))
+
+        downloads = []
+        lookasidecache = LookasideCache('md5', '_', '_')
+
+        hotfix_patch = os.path.join(self.cloned_repo_path, 'hotfix.patch')
+        self.write_file(hotfix_patch, content='+Hotfix')
+
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path, 'upload', hotfix_patch]
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            with patch('pyrpkg.lookaside.CGILookasideCache.upload', new=self.lookasidecache_upload):
+                cli.upload()
+        os.remove(hotfix_patch)
+
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path,
+                   'sources', '--outdir', self.cloned_repo_path]
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            with patch('pyrpkg.Commands.lookasidecache',
+                       new_callable=PropertyMock, return_value=lookasidecache):
+                cli.sources()
+
+        self.assertEqual([('hotfix.patch', {})], downloads)
+
+    def test_stop_verify_pool_on_error(self):
+        hotfix_patch = os.path.join(self.cloned_repo_path, 'hotfix.patch')
+        self.write_file(hotfix_patch, content='+Hotfix')
+
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path, 'upload', hotfix_patch]
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            with patch('pyrpkg.lookaside.CGILookasideCache.upload', new=self.lookasidecache_upload):
+                cli.upload()
+
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path,
+                   'sources', '--outdir', self.cloned_repo_path]
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            with patch('pyrpkg.ThreadPool') as ThreadPool:
+                pool = ThreadPool.return_value
+                pool.map.side_effect = IOError('Permission denied')
+                self.assertRaises(IOError, cli.sources)
+
+        pool.close.assert_called_once_with()
+        pool.join.assert_called_once_with()
+
 
 class TestFailureImportSrpm(CliTestCase):
 
@@ -1275,6 +1481,20 @@ class TestMockbuild(CliTestCase):
                         cli.cmd.srpmname]
         self.mock_run_command.assert_called_with(expected_cmd)
 
+    def test_mockargs_from_env(self):
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path,
+                   '--release', 'rhel-6', 'mockbuild',
+                   '--root', '/etc/mock/some-root']
+        mockargs = '--no-clean --define "dist .el6_9"'
+        with patch.dict('os.environ', {'MOCKARGS': mockargs}):
+            cli = self.mockbuild(cli_cmd)
+
+        expected_cmd = ['mock', '--no-clean', '--define', 'dist .el6_9',
+                        '-r', '/etc/mock/some-root',
+                        '--resultdir', cli.cmd.mock_results_dir, '--rebuild',
+                        cli.cmd.srpmname]
+        self.mock_run_command.assert_called_with(expected_cmd)
+
     @patch('pyrpkg.Commands._config_dir_basic')
     @patch('pyrpkg.Commands._config_dir_other')
     @patch('os.path.exists', return_value=False)
@@ -1690,13 +1910,16 @@ class TestPatch(CliTestCase):
                 # call of m.assert_has_calls.
                 m.assert_has_calls([
                     call(os.path.join(cli.cmd.path, patch_file), 'r'),
+                    call().__enter__(),
                     call().readlines(),
                 ])
                 # Here, skip to check call().readlines().__iter__() that
                 # happens only within mock 1.0.1.
                 m.assert_has_calls([
                     call(os.path.join(cli.cmd.path, patch_file), 'w'),
+                    call().__enter__(),
                     call().write(origin_diff),
+                    call().__exit__(None, None, None),
                 ])
 
     def test_fail_if_no_previous_diff_exists(self):
@@ -2019,6 +2242,42 @@ torsava's build #2150 of python3-ecosystem-master is in the "failed" state (reas
         self.assertEqual(self.sort_lines(expected_output),
                          self.sort_lines(output))
 
+    @patch('sys.stdout', new=StringIO())
+    @patch('time.sleep')
+    @patch('os.system')
+    @patch.object(Commands, 'kojiweburl', 'https://koji.fedoraproject.org/koji')
+    @patch.object(Commands, 'module_get_koji_state_dict',
+                  return_value={0: 'BUILDING', 1: 'COMPLETE'})
+    @patch.object(Commands, 'module_get_build')
+    @patch.object(Commands, 'load_kojisession')
+    def test_module_build_watch_backoff(self, mock_load_koji, mock_get_build,
+                                        mock_state_dict, mock_system, mock_sleep):
+        """
+        Test the watch interval grows while nothing changes, and is reset when
+        a component changes its state
+        """
+        def build(state_name, task_state):
+            return {
+                'id': 1500, 'owner': 'tester', 'name': 'python3-ecosystem',
+                'stream': 'master', 'state_name': state_name,
+                'state_reason': None,
+                'tasks': {'rpms': {'python-dns': {'state': task_state,
+                                                  'task_id': None}}},
+            }
+
+        mock_get_build.side_effect = (
+            [build('build', 0)] * 5 + [build('build', 1), build('ready', 1)])
+
+        cli_cmd = ['rpkg', '--path', self.cloned_repo_path,
+                   'module-build-watch', '1500']
+        with patch('sys.argv', new=cli_cmd):
+            cli = self.new_cli()
+            cli.module_build_watch()
+
+        self.assertEqual(7, mock_get_build.call_count)
+        self.assertEqual([call(15), call(30), call(60), call(60), call(60), call(15)],
+                         mock_sleep.call_args_list)
+
     @patch('sys.stdout', new=StringIO())
     @patch('requests.get')
     def test_module_overview(self, mock_get):
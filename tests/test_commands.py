@@ -73,9 +73,8 @@ class LoadNameVerRelTest(CommandTestCase):
         For this test purpose, firstly, original repo has to be cloned to a
         new place which has a name containing arbitrary spaces.
         """
-        cloned_repo_dir = '/tmp/rpkg test cloned repo'
-        if os.path.exists(cloned_repo_dir):
-            shutil.rmtree(cloned_repo_dir)
+        cloned_repo_dir = tempfile.mkdtemp(prefix='rpkg test cloned repo ')
+        self.addCleanup(shutil.rmtree, cloned_repo_dir)
         cloned_repo = self.cmd.repo.repo.clone(cloned_repo_dir)
 
         # Switching to branch eng-rhel-6 explicitly is required by running this
@@ -180,6 +179,14 @@ class LoadRPMDefinesTest(CommandTestCase):
 
         self.assertRaises(rpkgError, self.cmd.load_rpmdefines)
 
+    def test_rpmdefines_args_follow_reloaded_rpmdefines(self):
+        self.cmd._rpmdefines = ["--define '_sourcedir /path/to/src dir'"]
+        self.assertEqual(['--define', '_sourcedir /path/to/src dir'],
+                         self.cmd.rpmdefines_args)
+
+        self.cmd._rpmdefines = ["--define 'dist .el7'"]
+        self.assertEqual(['--define', 'dist .el7'], self.cmd.rpmdefines_args)
+
 
 class CheckRepoWithOrWithoutDistOptionCase(CommandTestCase):
     """Check whether there are unpushed changes with or without specified dist
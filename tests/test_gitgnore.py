@@ -75,6 +75,41 @@ class GitIgnoreTestCase(unittest.TestCase):
 
         self.assertTrue(gi.match('Surely this is matched by a wildcard?'))
 
+    def test_match_one_of_many_globs(self):
+        from pyrpkg.gitignore import GitIgnore
+
+        gi = GitIgnore(os.path.join(self.workdir, 'gitignore'))
+        gi.add('/pkg-1.0.tar.gz')
+        gi.add('*.rpm')
+        gi.add('results_*')
+
+        self.assertTrue(gi.match('/pkg-1.0.tar.gz'))
+        self.assertTrue(gi.match('pkg-1.0-1.src.rpm'))
+        self.assertTrue(gi.match('results_pkg'))
+
+        self.assertFalse(gi.match('pkg-1.1.tar.gz'))
+        self.assertFalse(gi.match('pkg.spec'))
+
+        # Lines added after a match are taken into account as well
+        gi.add('*.spec')
+        self.assertTrue(gi.match('pkg.spec'))
+
+    def test_match_suffix_glob(self):
+        gi_path = os.path.join(self.workdir, 'gitignore')
+
+        with open(gi_path, 'w') as f:
+            f.write('*.rpm\n*.tar.*\n')
+
+        from pyrpkg.gitignore import GitIgnore
+
+        gi = GitIgnore(gi_path)
+        self.assertTrue(gi.match('pkg-1.0-1.src.rpm'))
+        self.assertTrue(gi.match('/x86_64/pkg-1.0-1.x86_64.rpm'))
+        self.assertTrue(gi.match('pkg-1.0.tar.gz'))
+
+        self.assertFalse(gi.match('rpm'))
+        self.assertFalse(gi.match('pkg.spec'))
+
     def test_write_new_file(self):
         gi_path = os.path.join(self.workdir, 'gitignore')
 
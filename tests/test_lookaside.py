@@ -53,6 +53,17 @@ class CGILookasideCacheTestCase(unittest.TestCase):
         result = lc.hash_file(self.filename, 'md5')
         self.assertEqual(result, 'd41d8cd98f00b204e9800998ecf8427e')
 
+    @mock.patch('mmap.mmap')
+    def test_hash_file_not_mappable(self, mock_mmap):
+        mock_mmap.side_effect = EnvironmentError('mmap not supported')
+        lc = CGILookasideCache('sha512', '_', '_')
+
+        with open(self.filename, 'w') as f:
+            f.write('something')
+
+        result = lc.hash_file(self.filename, 'md5')
+        self.assertEqual(result, '437b930db84b8079c2dd804a71936b5f')
+
     def test_file_is_valid(self):
         lc = CGILookasideCache('md5', '_', '_')
 
@@ -96,6 +107,7 @@ class CGILookasideCacheTestCase(unittest.TestCase):
         lc.download(name, filename, hash, outfile, hashtype='sha512')
         self.assertEqual(curl.perform.call_count, 1)
         self.assertEqual(curlopts[pycurl.URL].decode('utf-8'), full_url)
+        self.assertEqual(curlopts[pycurl.BUFFERSIZE], 1024 * 1024)
         self.assertEqual(os.path.getmtime(outfile), 0)
 
         with open(outfile) as f:
@@ -110,6 +122,70 @@ class CGILookasideCacheTestCase(unittest.TestCase):
         lc.download(name, filename, hash, outfile)
         self.assertEqual(curl.perform.call_count, 2)
 
+    @mock.patch('pyrpkg.lookaside.pycurl.Curl')
+    def test_download_without_local_check(self, mock_curl):
+        def mock_getinfo(info):
+            return 200 if info == pycurl.RESPONSE_CODE else 0
+
+        def mock_perform():
+            curlopts[pycurl.WRITEDATA].write(b'content')
+
+        def mock_setopt(opt, value):
+            curlopts[opt] = value
+
+        curlopts = {}
+        curl = mock_curl.return_value
+        curl.getinfo.side_effect = mock_getinfo
+        curl.perform.side_effect = mock_perform
+        curl.setopt.side_effect = mock_setopt
+
+        with open(self.filename, 'wb') as f:
+            f.write(b'corrupted')
+
+        hash = hashlib.sha512(b'content').hexdigest()
+        lc = CGILookasideCache('sha512', 'http://example.com', '_')
+        with mock.patch.object(lc, 'file_is_valid',
+                               wraps=lc.file_is_valid) as file_is_valid:
+            lc.download('pyrpkg', 'pyrpkg-0.0.tar.xz', hash, self.filename,
+                        check_local=False)
+
+        # Only the downloaded file is checked
+        file_is_valid.assert_called_once_with(self.filename, hash, hashtype='sha512')
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(), b'content')
+
+    @mock.patch('pyrpkg.lookaside.sys.stdout')
+    @mock.patch('pyrpkg.lookaside.pycurl.Curl')
+    def test_download_without_progress(self, mock_curl, mock_stdout):
+        def mock_getinfo(info):
+            return 200 if info == pycurl.RESPONSE_CODE else 0
+
+        def mock_perform():
+            curlopts[pycurl.PROGRESSFUNCTION](7.0, 7.0, 0.0, 0.0)
+            curlopts[pycurl.WRITEDATA].write(b'content')
+
+        def mock_setopt(opt, value):
+            curlopts[opt] = value
+
+        curlopts = {}
+        curl = mock_curl.return_value
+        curl.getinfo.side_effect = mock_getinfo
+        curl.perform.side_effect = mock_perform
+        curl.setopt.side_effect = mock_setopt
+        mock_stdout.isatty.return_value = False
+
+        hash = hashlib.sha512(b'content').hexdigest()
+        outfile = os.path.join(self.workdir, 'pyrpkg-0.0.tar.xz')
+
+        lc = CGILookasideCache('sha512', 'http://example.com', '_')
+        lc.download('pyrpkg', 'pyrpkg-0.0.tar.xz', hash, outfile)
+        mock_stdout.write.assert_not_called()
+
+        mock_stdout.isatty.return_value = True
+        os.remove(outfile)
+        lc.download('pyrpkg', 'pyrpkg-0.0.tar.xz', hash, outfile)
+        self.assertEqual(mock_stdout.write.call_args_list[-1], mock.call('\n'))
+
     @mock.patch('pyrpkg.lookaside.pycurl.Curl')
     def test_download_kwargs(self, mock_curl):
         def mock_getinfo(info):
@@ -292,6 +368,17 @@ class CGILookasideCacheTestCase(unittest.TestCase):
 
         self.assertEqual(written_lines, expected_lines)
 
+    @mock.patch('pyrpkg.lookaside.sys.stdout')
+    def test_print_unchanged_progress_once(self, mock_stdout):
+        lc = CGILookasideCache('_', '_', '_')
+        lc.print_progress(2000.0, 500.0, 0.0, 0.0)
+        lc.print_progress(2000.0, 500.0, 0.0, 0.0)
+        lc.print_progress(2000.0, 500.1, 0.0, 0.0)
+        self.assertEqual(mock_stdout.write.call_count, 1)
+
+        lc.print_progress(2000.0, 1000.0, 0.0, 0.0)
+        self.assertEqual(mock_stdout.write.call_count, 2)
+
     @mock.patch('pyrpkg.lookaside.sys.stdout')
     def test_print_no_progress(self, mock_stdout):
         def mock_write(msg):
@@ -323,6 +410,42 @@ class CGILookasideCacheTestCase(unittest.TestCase):
         exists = lc.remote_file_exists('pyrpkg', 'pyrpkg-0.tar.xz', 'thehash')
         self.assertTrue(exists)
 
+    @mock.patch('pyrpkg.lookaside.pycurl.Curl')
+    def test_reuse_curl_handle(self, mock_curl):
+        def mock_perform():
+            curlopts[pycurl.WRITEFUNCTION](b'Available')
+
+        def mock_setopt(opt, value):
+            curlopts[opt] = value
+
+        curlopts = {}
+        curl = mock_curl.return_value
+        curl.getinfo.return_value = 200
+        curl.perform.side_effect = mock_perform
+        curl.setopt.side_effect = mock_setopt
+
+        lc = CGILookasideCache('_', '_', '_')
+        lc.remote_file_exists('pyrpkg', 'pyrpkg-0.tar.xz', 'thehash')
+        lc.remote_file_exists('pyrpkg', 'pyrpkg-1.tar.xz', 'thehash')
+        self.assertEqual(mock_curl.call_count, 1)
+        self.assertEqual(curl.reset.call_count, 1)
+        self.assertEqual(curl.perform.call_count, 2)
+        curl.close.assert_not_called()
+
+    @mock.patch('pyrpkg.lookaside.pycurl.Curl')
+    def test_close(self, mock_curl):
+        lc = CGILookasideCache('_', '_', '_')
+        # Nothing to close before any request
+        lc.close()
+
+        curl = lc.get_curl()
+        lc.close()
+        curl.close.assert_called_once_with()
+
+        # A new handle is made for the next request
+        lc.get_curl()
+        self.assertEqual(mock_curl.call_count, 2)
+
     @mock.patch('pyrpkg.lookaside.pycurl.Curl')
     def test_remote_file_does_not_exist(self, mock_curl):
         def mock_perform():
@@ -450,6 +573,131 @@ class CGILookasideCacheTestCase(unittest.TestCase):
         self.assertRaises(UploadError, lc.remote_file_exists, 'pyrpkg',
                           'pyrpkg-0.tar.xz', 'thehash')
 
+    def test_remote_files_exist_single_file(self):
+        lc = CGILookasideCache('_', '_', '_')
+
+        with mock.patch.object(lc, 'remote_file_exists',
+                               return_value=True) as remote_file_exists:
+            existing = lc.remote_files_exist(
+                'pyrpkg', [('pyrpkg-0.tar.xz', 'thehash')])
+
+        remote_file_exists.assert_called_once_with(
+            'pyrpkg', 'pyrpkg-0.tar.xz', 'thehash')
+        self.assertEqual(existing, set([('pyrpkg-0.tar.xz', 'thehash')]))
+
+    @mock.patch('pyrpkg.lookaside.pycurl.CurlMulti')
+    def test_remote_files_exist_overridden(self, mock_multi):
+        class LookasideCache(CGILookasideCache):
+            def remote_file_exists(self, name, filename, hash):
+                checked.append(filename)
+                return filename == 'pyrpkg-0.tar.xz'
+
+        checked = []
+        lc = LookasideCache('_', '_', '_')
+        existing = lc.remote_files_exist(
+            'pyrpkg', [('pyrpkg-0.tar.xz', 'thehash'),
+                       ('pyrpkg-1.tar.xz', 'otherhash')])
+
+        self.assertEqual(existing, set([('pyrpkg-0.tar.xz', 'thehash')]))
+        self.assertEqual(checked, ['pyrpkg-0.tar.xz', 'pyrpkg-1.tar.xz'])
+        mock_multi.assert_not_called()
+
+    @mock.patch('pyrpkg.lookaside.pycurl.CurlMulti')
+    @mock.patch('pyrpkg.lookaside.pycurl.Curl')
+    def test_remote_files_exist(self, mock_curl, mock_multi):
+        def mock_new_curl():
+            curl = mock.Mock()
+            curlopts = {}
+            curl.setopt.side_effect = curlopts.__setitem__
+            curl.getinfo.return_value = 200
+            handles.append(curlopts)
+            return curl
+
+        def mock_perform():
+            for curlopts in handles:
+                post_data = dict(curlopts[pycurl.HTTPPOST])
+                if post_data['filename'] == 'pyrpkg-0.tar.xz':
+                    curlopts[pycurl.WRITEFUNCTION](b'Available')
+                else:
+                    curlopts[pycurl.WRITEFUNCTION](b'Missing')
+            return 0, 0
+
+        handles = []
+        mock_curl.side_effect = mock_new_curl
+        multi = mock_multi.return_value
+        multi.perform.side_effect = mock_perform
+        multi.info_read.return_value = (0, [], [])
+
+        lc = CGILookasideCache('_', '_', '_')
+        existing = lc.remote_files_exist(
+            'pyrpkg', [('pyrpkg-0.tar.xz', 'thehash'),
+                       ('pyrpkg-1.tar.xz', 'otherhash')])
+
+        self.assertEqual(existing, set([('pyrpkg-0.tar.xz', 'thehash')]))
+        self.assertEqual(multi.add_handle.call_count, 2)
+        self.assertEqual(multi.remove_handle.call_count, 2)
+        multi.close.assert_called_once_with()
+
+    @mock.patch('pyrpkg.lookaside.pycurl.CurlMulti')
+    @mock.patch('pyrpkg.lookaside.pycurl.Curl')
+    def test_remote_files_exist_max_checks(self, mock_curl, mock_multi):
+        def mock_new_curl():
+            curl = mock.Mock()
+            curlopts = {}
+            curl.setopt.side_effect = curlopts.__setitem__
+            curl.getinfo.return_value = 200
+            handles[curl] = curlopts
+            return curl
+
+        def mock_add_handle(curl):
+            active.append(curl)
+            max_active[0] = max(max_active[0], len(active))
+
+        def mock_perform():
+            for curl in active:
+                curlopts = handles[curl]
+                post_data = dict(curlopts[pycurl.HTTPPOST])
+                if post_data['filename'] in ('pyrpkg-0.tar.xz', 'pyrpkg-4.tar.xz'):
+                    curlopts[pycurl.WRITEFUNCTION](b'Available')
+                else:
+                    curlopts[pycurl.WRITEFUNCTION](b'Missing')
+            return 0, 0
+
+        handles = {}
+        active = []
+        max_active = [0]
+        mock_curl.side_effect = mock_new_curl
+        multi = mock_multi.return_value
+        multi.add_handle.side_effect = mock_add_handle
+        multi.remove_handle.side_effect = active.remove
+        multi.perform.side_effect = mock_perform
+        multi.info_read.return_value = (0, [], [])
+
+        lc = CGILookasideCache('_', '_', '_')
+        files = [('pyrpkg-%d.tar.xz' % i, 'hash%d' % i) for i in range(5)]
+        existing = lc.remote_files_exist('pyrpkg', files, max_checks=2)
+
+        self.assertEqual(existing, set([('pyrpkg-0.tar.xz', 'hash0'),
+                                        ('pyrpkg-4.tar.xz', 'hash4')]))
+        self.assertEqual(max_active[0], 2)
+        self.assertEqual(multi.add_handle.call_count, 5)
+        self.assertEqual(active, [])
+
+    @mock.patch('pyrpkg.lookaside.pycurl.CurlMulti')
+    @mock.patch('pyrpkg.lookaside.pycurl.Curl')
+    def test_remote_files_exist_check_failed(self, mock_curl, mock_multi):
+        multi = mock_multi.return_value
+        multi.perform.return_value = (0, 0)
+        multi.info_read.return_value = (
+            0, [], [(mock_curl.return_value, 6,
+                     'Could not resolve host: example.com')])
+
+        lc = CGILookasideCache('_', '_', '_')
+        self.assertRaises(UploadError, lc.remote_files_exist, 'pyrpkg',
+                          [('pyrpkg-0.tar.xz', 'thehash'),
+                           ('pyrpkg-1.tar.xz', 'otherhash')])
+        multi.close.assert_called_once_with()
+
     @mock.patch('pyrpkg.lookaside.logging.getLogger')
     @mock.patch('pyrpkg.lookaside.pycurl.Curl')
     def test_upload(self, mock_curl, mock_logger):
@@ -497,6 +745,20 @@ class CGILookasideCacheTestCase(unittest.TestCase):
         self.assertEqual(curl.perform.call_count, 0)
         self.assertEqual(curl.setopt.call_count, 0)
 
+    @mock.patch('pyrpkg.lookaside.pycurl.Curl')
+    def test_upload_without_remote_check(self, mock_curl):
+        curl = mock_curl.return_value
+        curl.getinfo.return_value = 200
+
+        lc = CGILookasideCache('_', '_', '_')
+
+        with mock.patch.object(lc, 'remote_file_exists') as remote_file_exists:
+            lc.upload('pyrpkg', 'pyrpkg-0.0.tar.xz', 'thehash',
+                      check_remote=False)
+
+        self.assertEqual(remote_file_exists.call_count, 0)
+        self.assertEqual(curl.perform.call_count, 1)
+
     @mock.patch('pyrpkg.lookaside.pycurl.Curl')
     def test_upload_with_custom_certs(self, mock_curl):
         def mock_setopt(opt, value):
@@ -17,6 +17,12 @@ class SourceFileEntryTestCase(unittest.TestCase):
         expected = 'MD5 (afile) = ahash\n'
         self.assertEqual(str(e), expected)
 
+    def test_hash_entries(self):
+        e = sources.SourceFileEntry('md5', 'afile', 'ahash')
+        bsd_e = sources.BSDSourceFileEntry('MD5', 'afile', 'ahash')
+        other = sources.SourceFileEntry('md5', 'bfile', 'ahash')
+        self.assertEqual(set([e, bsd_e, other]), set([e, other]))
+
 
 class SourcesFileTestCase(unittest.TestCase):
     def setUp(self):
@@ -86,6 +92,10 @@ class SourcesFileTestCase(unittest.TestCase):
                  'ahash afile',
                  'SHA512 (afile) = ahash garbage',
                  'MD5 SHA512 (afile) = ahash',
+                 'MD5 (a file) = ahash',
+                 'MD5 (a)file) = ahash',
+                 'MD5 () = ahash',
+                 'MD5 (afile) = ',
                  ]
 
         for line in lines:
@@ -3,7 +3,7 @@ import warnings
 
 import mock
 
-from pyrpkg.utils import cached_property, warn_deprecated, log_result
+from pyrpkg.utils import cached_property, is_overridden, warn_deprecated, log_result
 
 
 class CachedPropertyTestCase(unittest.TestCase):
@@ -149,6 +149,29 @@ class DeprecationUtilsTestCase(unittest.TestCase):
         self.assertTrue('Foo.new_method' in written_lines[0])
 
 
+class IsOverriddenTestCase(unittest.TestCase):
+    class Base(object):
+        def foo(self):
+            pass
+
+    def test_not_overridden(self):
+        class Foo(self.Base):
+            pass
+
+        self.assertFalse(is_overridden(self.Base(), self.Base, 'foo'))
+        self.assertFalse(is_overridden(Foo(), self.Base, 'foo'))
+
+    def test_overridden(self):
+        class Foo(self.Base):
+            def foo(self):
+                pass
+
+        self.assertTrue(is_overridden(Foo(), self.Base, 'foo'))
+
+    def test_not_defined(self):
+        self.assertTrue(is_overridden(object(), self.Base, 'foo'))
+
+
 class LogResultTestCase(unittest.TestCase):
     def setUp(self):
         self.logs = []
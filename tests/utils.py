@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import atexit
 import os
 import subprocess
 import tempfile
@@ -7,6 +8,7 @@ import shutil
 import six
 import sys
 
+import git
 from pyrpkg import Commands
 
 # For running tests with Python 2.6
@@ -57,6 +59,59 @@ rm -rf $$RPM_BUILD_ROOT
 '''
 
 
+# The origin repo and its clone which CommandTestCase starts from. They are
+# built once, by the first test which needs them, then copied for each test.
+_template_repos = None
+
+
+def _set_test_user(repo):
+    config = repo.config_writer()
+    config.set_value('user', 'email', 'tester@example.com')
+    config.set_value('user', 'name', 'tester')
+    config.release()
+
+
+def _make_template_repos():
+    root = tempfile.mkdtemp(prefix='rpkg-commands-tests-template-')
+    atexit.register(shutil.rmtree, root, ignore_errors=True)
+
+    # create a base repo
+    repo_path = os.path.join(root, 'repo')
+    repo = git.Repo.init(repo_path, mkdir=True)
+
+    # Add spec file to this repo and commit
+    spec_file_path = os.path.join(repo_path, 'docpkg.spec')
+    with open(spec_file_path, 'w') as f:
+        f.write(spec_file)
+    for filename in ('sources', 'CHANGELOG.rst'):
+        open(os.path.join(repo_path, filename), 'w').close()
+    _set_test_user(repo)
+    repo.index.add([spec_file_path, 'sources', 'CHANGELOG.rst'])
+    repo.index.commit('initial commit')
+    for branch in ('eng-rhel-6', 'eng-rhel-6.5', 'eng-rhel-7', 'rhel-6.8', 'rhel-7'):
+        repo.create_head(branch)
+
+    # Clone the repo
+    cloned_repo_path = os.path.join(root, 'cloned')
+    cloned_repo = repo.clone(cloned_repo_path)
+    _set_test_user(cloned_repo)
+    for branch in ('eng-rhel-6', 'eng-rhel-6.5', 'eng-rhel-7'):
+        remote_branch = cloned_repo.remotes.origin.refs[branch]
+        cloned_repo.create_head(branch, remote_branch).set_tracking_branch(remote_branch)
+
+    return repo_path, cloned_repo_path
+
+
+def _copy_repo(src, dst):
+    """Copy the content of repo src into the existing directory dst"""
+    for name in os.listdir(src):
+        src_name = os.path.join(src, name)
+        if os.path.isdir(src_name):
+            shutil.copytree(src_name, os.path.join(dst, name), symlinks=True)
+        else:
+            shutil.copy2(src_name, dst)
+
+
 class Assertions(object):
 
     def get_exists_method(self, search_dir=None):
@@ -118,47 +173,22 @@ class Utils(object):
 class CommandTestCase(Assertions, Utils, unittest.TestCase):
 
     def setUp(self):
-        # create a base repo
-        self.repo_path = tempfile.mkdtemp(prefix='rpkg-commands-tests-')
+        global _template_repos
+        if _template_repos is None:
+            _template_repos = _make_template_repos()
 
         self.spec_file = 'docpkg.spec'
 
-        # Add spec file to this repo and commit
-        spec_file_path = os.path.join(self.repo_path, self.spec_file)
-        with open(spec_file_path, 'w') as f:
-            f.write(spec_file)
-
-        git_cmds = [
-            ['git', 'init'],
-            ['touch', 'sources', 'CHANGELOG.rst'],
-            ['git', 'add', spec_file_path, 'sources', 'CHANGELOG.rst'],
-            ['git', 'config', 'user.email', 'tester@example.com'],
-            ['git', 'config', 'user.name', 'tester'],
-            ['git', 'commit', '-m', '"initial commit"'],
-            ['git', 'branch', 'eng-rhel-6'],
-            ['git', 'branch', 'eng-rhel-6.5'],
-            ['git', 'branch', 'eng-rhel-7'],
-            ['git', 'branch', 'rhel-6.8'],
-            ['git', 'branch', 'rhel-7'],
-            ]
-        for cmd in git_cmds:
-            self.run_cmd(cmd, cwd=self.repo_path,
-                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        # Clone the repo
+        # Every test works on its own copy of the repo and its clone, so it is
+        # free to commit, push or switch branches in them.
+        self.repo_path = tempfile.mkdtemp(prefix='rpkg-commands-tests-')
+        _copy_repo(_template_repos[0], self.repo_path)
+
         self.cloned_repo_path = tempfile.mkdtemp(prefix='rpkg-commands-tests-cloned-')
-        self.run_cmd(['git', 'clone', self.repo_path, self.cloned_repo_path],
-                     stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        git_cmds = [
-            ['git', 'config', 'user.email', 'tester@example.com'],
-            ['git', 'config', 'user.name', 'tester'],
-            ['git', 'branch', '--track', 'eng-rhel-6', 'origin/eng-rhel-6'],
-            ['git', 'branch', '--track', 'eng-rhel-6.5', 'origin/eng-rhel-6.5'],
-            ['git', 'branch', '--track', 'eng-rhel-7', 'origin/eng-rhel-7'],
-            ]
-        for cmd in git_cmds:
-            self.run_cmd(cmd, cwd=self.cloned_repo_path,
-                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _copy_repo(_template_repos[1], self.cloned_repo_path)
+        config = git.Repo(self.cloned_repo_path).config_writer()
+        config.set_value('remote "origin"', 'url', self.repo_path)
+        config.release()
 
     def tearDown(self):
         shutil.rmtree(self.repo_path)